@@ -6,8 +6,23 @@ All system prompts are externalized to resources/prompts directory for better
 maintainability and customization.
 """
 
-from .image_generator import ImageGenerator
-from .prompt_templates import PromptTemplates, ImageStyle, CameraAngle
+from .prompt_templates import PromptTemplates, ImageStyle, CameraAngle, get_prompt_templates
 from .prompt_loader import PromptLoader
 
-__all__ = ["ImageGenerator", "PromptTemplates", "ImageStyle", "CameraAngle", "PromptLoader"]
+
+def __getattr__(name):
+    # ImageGenerator imports the Gemini SDK, which dominates import time;
+    # load it on first use so prompt-only callers start quickly
+    if name == "ImageGenerator":
+        from .image_generator import ImageGenerator
+        return ImageGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = [
+    "ImageGenerator",
+    "PromptTemplates",
+    "ImageStyle",
+    "CameraAngle",
+    "PromptLoader",
+    "get_prompt_templates",
+]
@@ -5,49 +5,456 @@ All system prompts are loaded from external files in resources/prompts directory
 """
 
 import os
+import re
+import time
+import random
+import shutil
+import threading
+import asyncio
+import hashlib
+import contextvars
 import logging
+import importlib.util
 from io import BytesIO
-from typing import List, Optional, Union, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, ClassVar, List, Optional, Tuple, Union, Dict, Any
 from pathlib import Path
 
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import types, errors
 from PIL import Image
 from dotenv import load_dotenv
 
-from .prompt_templates import PromptTemplates, ImageStyle, CameraAngle
+from .prompt_templates import PromptTemplates, ImageStyle, CameraAngle, get_prompt_templates
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Magic bytes at the start of every PNG file
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Output file formats: file extension and leading signature bytes
+OUTPUT_FORMATS = {
+    "png": ("png", PNG_SIGNATURE),
+    "jpeg": ("jpg", b"\xff\xd8\xff"),
+}
+
+# Quality used when an image has to be re-encoded for JPEG output
+JPEG_QUALITY = 90
+
+# Input images are downscaled so their longest edge fits this size before upload
+MAX_INPUT_EDGE = 1024
+
+# Input file formats Gemini accepts as-is; small files in these are uploaded undecoded
+PASSTHROUGH_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+# Default number of in-flight requests for batch generation
+DEFAULT_BATCH_CONCURRENCY = 5
+
+# Cached responses older than this are regenerated (seconds)
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Disk cache size budget; least recently used entries are deleted beyond it,
+# down to CACHE_PRUNE_RATIO of the budget so pruning doesn't run on every store
+CACHE_MAX_BYTES = 1024 ** 3
+CACHE_PRUNE_RATIO = 0.9
+
+# Most recently used cached images kept in memory in front of the disk cache
+MEMORY_CACHE_ENTRIES = 32
+
+# Maximum number of candidates requested in one call when a batch repeats a prompt
+DEFAULT_CANDIDATES_PER_REQUEST = 8
+
+# HTTP/2 multiplexing requires the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Keep-alive pool shared by every generate_content call of a client. All traffic
+# goes to one host, so most connections may stay idle-open for reuse, and idle
+# ones are kept long enough to span the gaps between batch requests.
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=64,
+    max_connections=100,
+    keepalive_expiry=75
+)
+
+
+# Model used for every generation request
+MODEL_NAME = "gemini-2.5-flash-image-preview"
+
+# API status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Finish reasons meaning the model refused the request; retrying will not help
+REFUSAL_FINISH_REASONS = frozenset({
+    "SAFETY",
+    "RECITATION",
+    "BLOCKLIST",
+    "PROHIBITED_CONTENT",
+    "SPII",
+    "IMAGE_SAFETY",
+    "IMAGE_PROHIBITED_CONTENT",
+    "IMAGE_RECITATION",
+})
+
+# Text replies that explain a refusal instead of returning an image
+REFUSAL_TEXT_PATTERN = re.compile(
+    r"\b(?:i\s+(?:can(?:no|')t|am\s+(?:not\s+able|unable)|won't)|unable\s+to)\b"
+    r".{0,80}?\b(?:generate|create|produce|make|edit|fulfil+)",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Rough prompt budget checked before calling the API (Gemini averages ~4 characters per token)
+MAX_PROMPT_TOKENS = 32_768
+CHARS_PER_TOKEN = 4
+
+# Attempts per request on retryable errors
+RETRY_ATTEMPTS = 3
+
+# Full-jitter backoff: retry n waits uniform(0, min(cap, base * 2 ** n)) seconds
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_CAP = 8.0
+
+
+# Async Gemini client used instead of self.client.aio by the current task tree;
+# set by batch_generate, whose event loop lives for a single call
+_async_client: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("gemini_async_client", default=None)
+
+
+def _ttl_seconds(ttl: str) -> float:
+    """Seconds in a Gemini duration string such as "3600s"."""
+    return float(ttl.rstrip("s"))
+
+
+def _retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given zero-based attempt."""
+    return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** (attempt + 1)))
+
+
+def _temp_path(path: Union[str, Path]) -> str:
+    """Temporary sibling of path, unique to this process and thread, for atomic replaces."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class _RequestPacer:
+    """Spaces API requests evenly to stay under a requests-per-minute quota."""
+    
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        # Shared by sync callers, async callers and their worker threads
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Claim the next request slot and return the seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        return slot - now
+
+
+def _log_cache_usage(response: Any):
+    """Log how many prompt tokens Gemini served from an explicit or implicit cache."""
+    usage = getattr(response, "usage_metadata", None)
+    cached_tokens = getattr(usage, "cached_content_token_count", None)
+    if isinstance(cached_tokens, int) and cached_tokens:
+        logger.info("Gemini served %d prompt tokens from cache", cached_tokens)
+
+
+def _check_request(prompt: str, input_images: Optional[List[Any]] = None):
+    """
+    Reject requests that cannot succeed before spending a round trip on them.
+    
+    Args:
+        prompt: Text prompt
+        input_images: Input images, for generation types that require them
+    
+    Raises:
+        ValueError: If the prompt is empty or over budget, or no images were given
+    """
+    if not prompt or not prompt.strip():
+        raise ValueError("Prompt must not be empty")
+    if len(prompt) // CHARS_PER_TOKEN > MAX_PROMPT_TOKENS:
+        raise ValueError(f"Prompt is too long (~{len(prompt) // CHARS_PER_TOKEN} tokens, max {MAX_PROMPT_TOKENS})")
+    if input_images is not None and not input_images:
+        raise ValueError("At least one input image is required")
+
+
+def _is_context_cache_error(error: Exception) -> bool:
+    """Check whether a request failed because its context cache expired or was deleted."""
+    if not isinstance(error, errors.ClientError):
+        return False
+    return error.code == 404 or "cached" in str(error.message or "").lower()
+
+
+def _rejects_candidate_count(error: Exception) -> bool:
+    """Check whether a multi-candidate request failed because the model rejects candidate_count."""
+    # Only a 400 says the request itself is invalid; a 429 is transient rate limiting
+    return isinstance(error, errors.ClientError) and error.code == 400
+
+
+def _build_http_options() -> types.HttpOptions:
+    """Build transport options for a pooled, keep-alive (HTTP/2 if available) connection."""
+    client_args = {"http2": HTTP2_AVAILABLE, "limits": HTTP_LIMITS}
+    return types.HttpOptions(
+        client_args=dict(client_args),
+        async_client_args=dict(client_args)
+    )
+
 
 class ImageGenerator:
     """
     Professional image generation service using Gemini API.
     Supports text-to-image, inpainting, style transfer, and multi-image composition.
+    
+    Every generation method has an ``a``-prefixed async variant (for example
+    agenerate_text_to_image) that does not block the event loop; async
+    servers should prefer those.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Loaded once per process and shared by every instance; templates are stateless
+    prompt_templates: ClassVar[PromptTemplates] = get_prompt_templates()
+    
+    # Prompt reformulations tried once each when the model answers without an image
+    _FALLBACK_PROMPTS = [
+        "Generate a high-quality image: {prompt}",
+        "Create an image",
+    ]
+    
+    # Template type -> PromptTemplates method name used by generate_with_template
+    _TEMPLATE_FNS = {
+        "text_to_image": "text_to_image",
+        "inpainting": "inpainting",
+        "style_transfer": "style_transfer",
+        "multi_image_composition": "multi_image_composition",
+        "text_rendering": "text_rendering",
+    }
+    
+    # Template types that edit an input image rather than generate from text
+    _REQUIRES_IMAGE = frozenset({"inpainting", "style_transfer", "multi_image_composition"})
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        use_cache: bool = True,
+        cache_dir: Optional[Union[str, Path]] = None,
+        cache_ttl: Optional[float] = CACHE_TTL_SECONDS,
+        keep_image_data: bool = True,
+        requests_per_minute: Optional[float] = None,
+        cache_max_bytes: Optional[int] = CACHE_MAX_BYTES,
+        output_format: str = "png"
+    ):
         """
         Initialize the image generator.
         
         Args:
             api_key: Gemini API key. If None, will use GEMINI_API_KEY from environment.
+            concurrency: Maximum number of concurrent requests in batch generation
+            use_cache: Whether to reuse cached images for identical requests
+            cache_dir: Response cache directory. If None, uses outputs/.cache.
+            cache_ttl: Seconds a cached image stays valid. If None, never expires.
+            keep_image_data: Whether results keep the raw image bytes once the
+                image is saved to disk. If False, saved results carry only
+                image_path and image_size, so servers returning paths don't
+                hold every generated image in memory.
+            requests_per_minute: Gemini request quota to pace calls to. If set,
+                requests (including retries and fallbacks) are spaced evenly
+                so bursts wait locally instead of being rejected with 429s.
+            cache_max_bytes: Disk budget for the response cache; the least
+                recently used entries are deleted beyond it. If None, unbounded.
+            output_format: File format for saved images, "png" or "jpeg".
+                Gemini returns PNG, so JPEG output is a lossy re-encode at
+                JPEG_QUALITY that only reduces disk usage; it saves no
+                bandwidth, and saved files fed back in as editing inputs
+                lose quality with every round.
+        
+        Raises:
+            ValueError: If no API key is available or output_format is unknown
         """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        self.client = genai.Client(api_key=self.api_key)
-        self.prompt_templates = PromptTemplates()
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        
+        self.client = self._new_client()
+        self.concurrency = concurrency
+        self.keep_image_data = keep_image_data
+        self._pacer = _RequestPacer(requests_per_minute) if requests_per_minute else None
+        # Cleared the first time the model rejects a multi-candidate request
+        self._multi_candidate = True
         
         # Create output directory if it doesn't exist
         self.output_dir = Path("outputs")
         self.output_dir.mkdir(exist_ok=True)
+        self._output_str = os.fspath(self.output_dir)
+        self.output_format = output_format
+        self._output_ext, self._output_signature = OUTPUT_FORMATS[output_format]
+        
+        # Content-addressed cache of generated images, keyed by request contents
+        self.use_cache = use_cache
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else self.output_dir / ".cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_ttl = cache_ttl
+        # Changing GEMINI_CACHE_BUST moves every request to fresh keys; old entries age out
+        self._cache_bust = os.getenv("GEMINI_CACHE_BUST", "")
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self._memory_cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # Cache lookups and stores also run in worker threads on the async path;
+        # the lock guards the memory cache and cache_stats
+        self._memory_lock = threading.Lock()
+        self.cache_max_bytes = cache_max_bytes
+        # Size of the disk cache, counted by the first prune and tracked after it
+        self._cache_bytes: Optional[int] = None
+        self._prune_lock = threading.Lock()
+        # Async requests currently generating an uncached image, by cache key
+        self._inflight: Dict[str, "asyncio.Future[None]"] = {}
+        
+        # Gemini context cache shared by every request, set by attach_context_cache.
+        # Without a live cache the instruction is sent inline with each request.
+        self._cached_content: Optional[str] = None
+        self._cached_instruction: Optional[str] = None
+        self._context_ttl = "600s"
+        # When the cache's TTL is next extended (or a dropped cache recreated)
+        self._context_refresh_at = 0.0
+        self._context_lock = threading.Lock()
+    
+    def _new_client(self) -> genai.Client:
+        """Create a Gemini client with pooled, keep-alive connections."""
+        return genai.Client(api_key=self.api_key, http_options=_build_http_options())
+    
+    def create_context_cache(self, system_instruction: str, ttl: str = "600s") -> Optional[str]:
+        """
+        Cache static instructions server-side with Gemini context caching.
+        
+        Every later request references the cache, so the shared instructions
+        are not re-sent and re-processed on each call. Gemini only caches
+        content above a minimum token count, and not every model supports
+        caching; if creation fails, requests are sent without a cache.
+        
+        The cache's TTL is extended while requests keep using it, and a cache
+        that has expired anyway is dropped and recreated (see
+        attach_context_cache).
+        
+        Args:
+            system_instruction: Static instruction text shared by all requests
+            ttl: How long Gemini keeps the cache, e.g. "600s"
+        
+        Returns:
+            Name of the created cache, or None if caching is unavailable
+        """
+        try:
+            cache = self.client.caches.create(
+                model=MODEL_NAME,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_instruction,
+                    ttl=ttl,
+                ),
+            )
+        except errors.APIError as e:
+            logger.warning("Context caching unavailable, sending full prompts: %s", e)
+            return None
+        
+        logger.info("Created context cache: %s", cache.name)
+        self.attach_context_cache(cache.name, system_instruction, ttl)
+        self._context_refresh_at = time.monotonic() + _ttl_seconds(ttl) / 2
+        return cache.name
+    
+    def attach_context_cache(self, name: str, system_instruction: str, ttl: str = "600s"):
+        """
+        Reference an existing context cache, e.g. one another process created.
+        
+        Its TTL is extended on the next request and then every half TTL. If a
+        request finds the cache gone, it is retried with the instruction
+        inline and the next request recreates the cache.
+        
+        Args:
+            name: Cache name returned by create_context_cache
+            system_instruction: Instruction text the cache holds
+            ttl: TTL to keep extending the cache by, e.g. "600s"
+        """
+        self._cached_content = name
+        self._cached_instruction = system_instruction
+        self._context_ttl = ttl
+        self._context_refresh_at = 0.0
+    
+    def _maintain_context_cache(self):
+        """Extend the context cache's TTL, or recreate a dropped cache, once it is due."""
+        with self._context_lock:
+            if time.monotonic() < self._context_refresh_at:
+                return
+            self._context_refresh_at = time.monotonic() + _ttl_seconds(self._context_ttl) / 2
+            
+            if self._cached_content is not None:
+                try:
+                    self.client.caches.update(
+                        name=self._cached_content,
+                        config=types.UpdateCachedContentConfig(ttl=self._context_ttl),
+                    )
+                    return
+                except errors.APIError as e:
+                    logger.warning("Could not extend context cache %s, recreating it: %s", self._cached_content, e)
+                    self._cached_content = None
+            
+            self.create_context_cache(self._cached_instruction, self._context_ttl)
+    
+    def _context_maintenance_due(self) -> bool:
+        """Whether _maintain_context_cache has work to do."""
+        return self._cached_instruction is not None and time.monotonic() >= self._context_refresh_at
+    
+    def _drop_context_cache(self, name: str):
+        """Stop referencing a context cache Gemini no longer has; the next request recreates it."""
+        with self._context_lock:
+            if self._cached_content == name:
+                logger.warning("Context cache %s is gone, sending the instruction inline", name)
+                self._cached_content = None
+                self._context_refresh_at = 0.0
+    
+    def _request_config(
+        self,
+        config: Optional[types.GenerateContentConfig]
+    ) -> Optional[types.GenerateContentConfig]:
+        """Add the shared instruction to a request config, by cache reference or inline."""
+        if self._cached_instruction is None:
+            return config
+        if self._cached_content is not None:
+            context = {"cached_content": self._cached_content}
+        else:
+            context = {"system_instruction": self._cached_instruction}
+        return (config or types.GenerateContentConfig()).model_copy(update=context)
+    
+    async def awarm_up(self):
+        """
+        Open a pooled connection to Gemini before the first request.
+        
+        Servers can call this at startup so the first user request doesn't pay
+        the TCP and TLS handshake. Failures are logged and otherwise ignored.
+        """
+        try:
+            await self.client.aio.models.get(model=MODEL_NAME)
+        except Exception as e:
+            logger.warning("Could not warm up the Gemini connection: %s", e)
+    
+    def close(self):
+        """Close the pooled HTTP connections held by the Gemini client."""
+        self.client.close()
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections, including the async client."""
+        self.client.close()
+        await self.client.aio.aclose()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def generate_text_to_image(
         self,
@@ -67,136 +474,18 @@ class ImageGenerator:
             Dictionary containing generated image data and metadata
         """
         try:
-            logger.info(f"Generating text-to-image with prompt: {prompt[:100]}...")
+            logger.info("Generating text-to-image with prompt: %.100s...", prompt)
             
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash-image-preview",
+            return self._generate_image_with_fallback(
                 contents=[prompt],
+                prompt=prompt,
+                generation_type="text_to_image",
+                filename=output_filename or "generated_text_to_image",
+                save_image=save_image
             )
             
-            result = {
-                "success": True,
-                "text_content": None,
-                "image_data": None,
-                "metadata": {
-                    "model": "gemini-2.5-flash-image-preview",
-                    "prompt": prompt,
-                    "type": "text_to_image"
-                }
-            }
-            
-            for part in response.candidates[0].content.parts:
-                if part.text is not None:
-                    result["text_content"] = part.text
-                    logger.info(f"Generated text: {part.text}")
-                
-                if part.inline_data is not None:
-                    result["image_data"] = part.inline_data.data
-                    
-                    if save_image:
-                        filename = output_filename or "generated_text_to_image"
-                        image_path = self._save_image(part.inline_data.data, filename)
-                        result["image_path"] = str(image_path)
-                        logger.info(f"Image saved to: {image_path}")
-            
-            # If no image was generated, try multiple strategies to generate an image
-            if result["image_data"] is None:
-                logger.info("No image data found, attempting to generate image using multiple strategies")
-                
-                # Strategy 1: Use original prompt
-                try:
-                    logger.info("Strategy 1: Using original prompt")
-                    prompt_response = self.client.models.generate_content(
-                        model="gemini-2.5-flash-image-preview",
-                        contents=[prompt],
-                    )
-                    
-                    for part in prompt_response.candidates[0].content.parts:
-                        if part.inline_data is not None:
-                            result["image_data"] = part.inline_data.data
-                            
-                            if save_image:
-                                filename = output_filename or "generated_text_to_image"
-                                image_path = self._save_image(part.inline_data.data, filename)
-                                result["image_path"] = str(image_path)
-                                logger.info(f"Image generated from original prompt and saved to: {image_path}")
-                            break
-                except Exception as e:
-                    logger.warning(f"Strategy 1 failed: {str(e)}")
-                
-                # Strategy 2: If still no image, try with a more explicit prompt
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 2: Using explicit image generation prompt")
-                        explicit_prompt = f"Generate a high-quality image: {prompt}"
-                        explicit_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[explicit_prompt],
-                        )
-                        
-                        for part in explicit_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "generated_text_to_image"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from explicit prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 2 failed: {str(e)}")
-                
-                # Strategy 3: If still no image, try with a simple prompt
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 3: Using simple prompt")
-                        simple_prompt = "Create an image"
-                        simple_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[simple_prompt],
-                        )
-                        
-                        for part in simple_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "generated_text_to_image"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from simple prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 3 failed: {str(e)}")
-                
-                # Strategy 4: Force image generation with explicit instruction
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 4: Force image generation")
-                        force_prompt = f"Generate an image of: {prompt}. Create a visual representation."
-                        force_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[force_prompt],
-                        )
-                        
-                        for part in force_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "generated_text_to_image"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from force prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 4 failed: {str(e)}")
-            
-            return result
-            
         except Exception as e:
-            logger.error(f"Error generating text-to-image: {str(e)}")
+            logger.error("Error generating text-to-image: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -206,7 +495,7 @@ class ImageGenerator:
     def generate_image_editing(
         self,
         prompt: str,
-        input_image: Union[str, Path, Image.Image],
+        input_image: Union[str, Path, bytes, BinaryIO, Image.Image],
         output_filename: Optional[str] = None,
         save_image: bool = True
     ) -> Dict[str, Any]:
@@ -215,7 +504,7 @@ class ImageGenerator:
         
         Args:
             prompt: Text description for image editing
-            input_image: Input image (path, PIL Image, or base64 string)
+            input_image: Input image (path, encoded image bytes, binary file object, or PIL Image)
             output_filename: Output filename (without extension)
             save_image: Whether to save the image to disk
         
@@ -223,121 +512,21 @@ class ImageGenerator:
             Dictionary containing generated image data and metadata
         """
         try:
-            logger.info(f"Generating image editing with prompt: {prompt[:100]}...")
+            logger.info("Generating image editing with prompt: %.100s...", prompt)
             
             # Load input image
-            if isinstance(input_image, (str, Path)):
-                image = Image.open(input_image)
-            elif isinstance(input_image, Image.Image):
-                image = input_image
-            else:
-                raise ValueError("Invalid input image type")
+            image = self._load_and_prep_image(input_image)
             
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash-image-preview",
+            return self._generate_image_with_fallback(
                 contents=[prompt, image],
+                prompt=prompt,
+                generation_type="image_editing",
+                filename=output_filename or "generated_image_editing",
+                save_image=save_image
             )
             
-            result = {
-                "success": True,
-                "text_content": None,
-                "image_data": None,
-                "metadata": {
-                    "model": "gemini-2.5-flash-image-preview",
-                    "prompt": prompt,
-                    "type": "image_editing"
-                }
-            }
-            
-            for part in response.candidates[0].content.parts:
-                if part.text is not None:
-                    result["text_content"] = part.text
-                    logger.info(f"Generated text: {part.text}")
-                
-                if part.inline_data is not None:
-                    result["image_data"] = part.inline_data.data
-                    
-                    if save_image:
-                        filename = output_filename or "generated_image_editing"
-                        image_path = self._save_image(part.inline_data.data, filename)
-                        result["image_path"] = str(image_path)
-                        logger.info(f"Image saved to: {image_path}")
-            
-            # If no image was generated, try multiple strategies to generate an image
-            if result["image_data"] is None:
-                logger.info("No image data found, attempting to generate image using multiple strategies")
-                
-                # Strategy 1: Use original prompt
-                try:
-                    logger.info("Strategy 1: Using original prompt")
-                    prompt_response = self.client.models.generate_content(
-                        model="gemini-2.5-flash-image-preview",
-                        contents=[prompt],
-                    )
-                    
-                    for part in prompt_response.candidates[0].content.parts:
-                        if part.inline_data is not None:
-                            result["image_data"] = part.inline_data.data
-                            
-                            if save_image:
-                                filename = output_filename or "generated_image_editing"
-                                image_path = self._save_image(part.inline_data.data, filename)
-                                result["image_path"] = str(image_path)
-                                logger.info(f"Image generated from original prompt and saved to: {image_path}")
-                            break
-                except Exception as e:
-                    logger.warning(f"Strategy 1 failed: {str(e)}")
-                
-                # Strategy 2: If still no image, try with a more explicit prompt
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 2: Using explicit image generation prompt")
-                        explicit_prompt = f"Generate a high-quality image: {prompt}"
-                        explicit_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[explicit_prompt],
-                        )
-                        
-                        for part in explicit_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "generated_image_editing"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from explicit prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 2 failed: {str(e)}")
-                
-                # Strategy 3: If still no image, try with a simple prompt
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 3: Using simple prompt")
-                        simple_prompt = "Create an image"
-                        simple_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[simple_prompt],
-                        )
-                        
-                        for part in simple_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "generated_image_editing"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from simple prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 3 failed: {str(e)}")
-            
-            return result
-            
         except Exception as e:
-            logger.error(f"Error generating image editing: {str(e)}")
+            logger.error("Error generating image editing: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -346,7 +535,7 @@ class ImageGenerator:
     
     def edit_image(
         self,
-        input_image: Union[str, Path, Image.Image],
+        input_image: Union[str, Path, bytes, BinaryIO, Image.Image],
         prompt: str,
         output_filename: Optional[str] = None,
         save_image: bool = True
@@ -355,7 +544,7 @@ class ImageGenerator:
         Edit existing image with text prompt (alias for generate_image_editing).
         
         Args:
-            input_image: Input image (path, PIL Image, or base64 string)
+            input_image: Input image (path, encoded image bytes, binary file object, or PIL Image)
             prompt: Text description for image editing
             output_filename: Output filename (without extension)
             save_image: Whether to save the image to disk
@@ -390,28 +579,23 @@ class ImageGenerator:
             template_kwargs = {k: v for k, v in kwargs.items() 
                              if k not in ['output_filename', 'save_image', 'input_image']}
             
-            if template_type == "text_to_image":
-                prompt = self.prompt_templates.text_to_image(**template_kwargs)
-            elif template_type == "inpainting":
-                prompt = self.prompt_templates.inpainting(**template_kwargs)
-            elif template_type == "style_transfer":
-                prompt = self.prompt_templates.style_transfer(**template_kwargs)
-            elif template_type == "multi_image_composition":
-                prompt = self.prompt_templates.multi_image_composition(**template_kwargs)
-            elif template_type == "text_rendering":
-                prompt = self.prompt_templates.text_rendering(**template_kwargs)
-            else:
+            template_name = self._TEMPLATE_FNS.get(template_type)
+            if template_name is None:
                 raise ValueError(f"Unknown template type: {template_type}")
+            prompt = getattr(self.prompt_templates, template_name)(**template_kwargs)
             
-            logger.info(f"Using template '{template_type}' with generated prompt: {prompt[:100]}...")
+            logger.info("Using template '%s' with generated prompt: %.100s...", template_type, prompt)
             
             # Generate image
-            if template_type in ["inpainting", "style_transfer", "multi_image_composition"]:
+            if template_type in self._REQUIRES_IMAGE:
                 # These require input images
                 input_image = kwargs.get("input_image")
                 if not input_image:
                     raise ValueError(f"Template '{template_type}' requires input_image parameter")
                 
+                # Decode once here; generate_image_editing reuses the loaded image as-is
+                input_image = self._load_and_prep_image(input_image)
+                
                 # Extract only the parameters needed for image editing
                 edit_kwargs = {
                     'output_filename': kwargs.get('output_filename'),
@@ -427,17 +611,107 @@ class ImageGenerator:
                 return self.generate_text_to_image(prompt, **text_kwargs)
                 
         except Exception as e:
-            logger.error(f"Error generating with template '{template_type}': {str(e)}")
+            logger.error("Error generating with template '%s': %s", template_type, e)
             return {
                 "success": False,
                 "error": str(e),
                 "metadata": {"type": template_type}
             }
     
+    def _load_and_prep_image(
+        self,
+        src: Union[str, Path, bytes, BinaryIO, Image.Image, types.Part],
+        max_edge: int = MAX_INPUT_EDGE
+    ) -> Union[Image.Image, types.Part]:
+        """
+        Load an input image and downscale it for upload.
+        
+        This is the single place input images are opened. Images larger than
+        max_edge on their longest side are resized with Lanczos resampling;
+        caller-owned PIL images are copied, not modified, and images that are
+        already loaded and small enough are returned unchanged. JPEG files are
+        decoded at a reduced DCT scale when they are much larger than max_edge.
+        
+        Files (or encoded bytes, such as an upload held in memory, or an open
+        binary file) that already fit within max_edge and are PNG, JPEG or WebP
+        are never decoded: only their header is read, and the encoded bytes are
+        returned as an inline types.Part.
+        
+        Args:
+            src: Image path, encoded image bytes, seekable binary file
+                object (read from the start), PIL Image, or an already
+                prepared types.Part
+            max_edge: Maximum size of the longest edge in pixels
+        
+        Returns:
+            PIL Image or types.Part ready to send to the API
+        
+        Raises:
+            ValueError: If src is not a path, bytes, file object, PIL Image or
+                types.Part
+        """
+        if isinstance(src, (str, Path, bytes)) or hasattr(src, "read"):
+            image = Image.open(BytesIO(src) if isinstance(src, bytes) else src)
+            mime_type = PASSTHROUGH_MIME_TYPES.get(image.format)
+            if mime_type is not None and max(image.size) <= max_edge:
+                if isinstance(src, bytes):
+                    data = src
+                elif isinstance(src, (str, Path)):
+                    image.close()
+                    data = Path(src).read_bytes()
+                else:
+                    src.seek(0)
+                    data = src.read()
+                return types.Part.from_bytes(data=data, mime_type=mime_type)
+            if image.format == "JPEG":
+                image.draft("RGB", (max_edge, max_edge))
+        elif isinstance(src, Image.Image):
+            image = src
+            if max(image.size) > max_edge:
+                image = image.copy()
+        elif isinstance(src, types.Part):
+            return src
+        else:
+            raise ValueError("Invalid input image type")
+        
+        if max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        else:
+            image.load()
+        return image
+    
+    def _load_input_images(
+        self,
+        input_images: List[Union[str, Path, bytes, BinaryIO, Image.Image]]
+    ) -> List[Union[Image.Image, types.Part]]:
+        """
+        Load and downscale several input images in parallel.
+        
+        File reads and decoding release the GIL, so a thread pool overlaps them.
+        
+        Args:
+            input_images: List of image paths, encoded image bytes, binary file objects, or PIL Images
+        
+        Returns:
+            List of prepared images (see _load_and_prep_image) in input order
+        """
+        def load(indexed_image):
+            i, input_image = indexed_image
+            try:
+                return self._load_and_prep_image(input_image)
+            except ValueError:
+                raise ValueError(f"Invalid input image type at index {i}")
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(input_images)))) as executor:
+            return list(executor.map(load, enumerate(input_images)))
+    
     def _save_image(self, image_data: bytes, filename: str) -> Path:
         """
         Save image data to file.
         
+        Data already in the output format is written as-is; anything else is
+        converted to it.
+        
         Args:
             image_data: Raw image data
             filename: Filename without extension
@@ -445,182 +719,1040 @@ class ImageGenerator:
         Returns:
             Path to saved image
         """
-        image = Image.open(BytesIO(image_data))
-        image_path = self.output_dir / f"{filename}.png"
-        image.save(image_path)
-        return image_path
+        path_str = f"{self._output_str}/{filename}.{self._output_ext}"
+        
+        # Rename a finished temporary file into place: readers of the outputs
+        # directory never see a partial image, and a previous file hard-linked
+        # to a cache entry is replaced rather than written through
+        temp_path = _temp_path(path_str)
+        if image_data.startswith(self._output_signature):
+            with open(temp_path, "wb") as f:
+                f.write(image_data)
+        elif self.output_format == "jpeg":
+            Image.open(BytesIO(image_data)).convert("RGB").save(
+                temp_path, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True
+            )
+        else:
+            Image.open(BytesIO(image_data)).save(temp_path, format="PNG")
+        os.replace(temp_path, path_str)
+        return Path(path_str)
     
-    def batch_generate(
-        self,
-        prompts: List[str],
-        output_prefix: str = "batch"
-    ) -> List[Dict[str, Any]]:
+    def _new_result(self, prompt: str, generation_type: str, **metadata) -> Dict[str, Any]:
+        """Build an empty successful result dictionary for a generation request."""
+        return {
+            "success": True,
+            "text_content": None,
+            "image_data": None,
+            "metadata": {
+                "model": MODEL_NAME,
+                "prompt": prompt,
+                "type": generation_type,
+                **metadata
+            }
+        }
+    
+    def _cache_key(self, contents: List[Any], repeat: int = 0) -> str:
         """
-        Generate multiple images in batch.
+        Compute the response cache key for a request.
         
         Args:
-            prompts: List of text prompts
-            output_prefix: Prefix for output filenames
+            contents: Request contents (prompt text, PIL images and inline parts)
+            repeat: Occurrence of these contents within a batch; later
+                occurrences get their own key so they yield distinct images
         
         Returns:
-            List of generation results
+            Hex BLAKE2b digest of the model name, GEMINI_CACHE_BUST and every
+            content item, with runs of whitespace in text items collapsed
+        """
+        digest = hashlib.blake2b(MODEL_NAME.encode("utf-8"), digest_size=32)
+        if self._cache_bust:
+            digest.update(b"\0bust\0")
+            digest.update(self._cache_bust.encode("utf-8"))
+        if repeat:
+            digest.update(f"\0repeat:{repeat}\0".encode("utf-8"))
+        if self._cached_instruction is not None:
+            digest.update(b"\0instruction\0")
+            digest.update(self._cached_instruction.encode("utf-8"))
+        for item in contents:
+            if isinstance(item, Image.Image):
+                digest.update(f"\0image:{item.mode}:{item.size}\0".encode("utf-8"))
+                digest.update(item.tobytes())
+            elif isinstance(item, types.Part):
+                digest.update(f"\0part:{item.inline_data.mime_type}\0".encode("utf-8"))
+                digest.update(item.inline_data.data)
+            else:
+                # Whitespace-only differences (template line breaks, double spaces) share a key
+                digest.update(b"\0text\0")
+                digest.update(" ".join(str(item).split()).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _load_cached(
+        self,
+        key: str,
+        prompt: str,
+        generation_type: str,
+        filename: str,
+        save_image: bool,
+        **metadata
+    ) -> Optional[Dict[str, Any]]:
         """
-        results = []
+        Return a result built from the response cache, or None on a miss.
         
-        for i, prompt in enumerate(prompts):
-            logger.info(f"Generating batch image {i+1}/{len(prompts)}")
-            result = self.generate_text_to_image(
-                prompt=prompt,
-                output_filename=f"{output_prefix}_{i+1:03d}",
-                save_image=True
-            )
-            results.append(result)
+        Recently used images are served from memory; everything else from the
+        disk cache. Entries older than cache_ttl count as misses.
+        """
+        if not self.use_cache:
+            return None
         
-        return results
+        cache_path = self.cache_dir / f"{key}.png"
+        image_data = self._lookup_cached(key, cache_path)
+        with self._memory_lock:
+            self.cache_stats["misses" if image_data is None else "hits"] += 1
+        if image_data is None:
+            return None
+        
+        logger.info("Cache hit for %s request: %s", generation_type, cache_path)
+        result = self._new_result(prompt, generation_type, cached=True, **metadata)
+        result["image_data"] = image_data
+        
+        if save_image:
+            image_path = Path(f"{self._output_str}/{filename}.{self._output_ext}")
+            if image_data.startswith(self._output_signature):
+                try:
+                    self._link_file(cache_path, image_path)
+                except FileNotFoundError:
+                    image_path = self._save_image(image_data, filename)
+            else:
+                # Cached in another format than the output one; convert it
+                image_path = self._save_image(image_data, filename)
+            result["image_path"] = str(image_path)
+            self._release_image_data(result)
+        return result
     
-    def clean_image(
+    def _lookup_cached(self, key: str, cache_path: Path) -> Optional[bytes]:
+        """Return fresh cached image data from memory or disk, or None."""
+        now = time.time()
+        
+        with self._memory_lock:
+            entry = self._memory_cache.get(key)
+            if entry is not None:
+                if self.cache_ttl is None or now - entry[0] <= self.cache_ttl:
+                    self._memory_cache.move_to_end(key)
+                    return entry[1]
+                del self._memory_cache[key]
+        
+        try:
+            created = cache_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if self.cache_ttl is not None and now - created > self.cache_ttl:
+            return None
+        
+        image_data = cache_path.read_bytes()
+        # Record the use in atime for LRU pruning; mtime keeps the creation time for the TTL
+        os.utime(cache_path, (now, created))
+        self._remember_cached(key, image_data, created)
+        return image_data
+    
+    def _remember_cached(self, key: str, image_data: bytes, created: float):
+        """Add an image to the in-memory cache, evicting the least recently used."""
+        with self._memory_lock:
+            self._memory_cache[key] = (created, image_data)
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > MEMORY_CACHE_ENTRIES:
+                self._memory_cache.popitem(last=False)
+    
+    def _store_cached(self, key: str, image_data: bytes, image_path: Optional[str] = None):
+        """
+        Write generated image data to the response cache.
+        
+        Args:
+            key: Cache key from _cache_key
+            image_data: Generated image data
+            image_path: Saved output file to link into the cache instead of
+                writing the data a second time; ignored if it was converted
+                to another format, so the cache always holds the model's bytes
+        """
+        if not self.use_cache:
+            return
+        
+        self._remember_cached(key, image_data, time.time())
+        cache_path = self.cache_dir / f"{key}.png"
+        if image_path is not None and image_data.startswith(self._output_signature):
+            self._link_file(image_path, cache_path)
+        else:
+            # Write to a temporary file first so concurrent readers never see a partial image
+            temp_path = _temp_path(cache_path)
+            with open(temp_path, "wb") as f:
+                f.write(image_data)
+            os.replace(temp_path, cache_path)
+        
+        if self.cache_max_bytes is not None:
+            with self._prune_lock:
+                if self._cache_bytes is not None:
+                    self._cache_bytes += len(image_data)
+                if self._cache_bytes is None or self._cache_bytes > self.cache_max_bytes:
+                    self._prune_cache()
+    
+    def _prune_cache(self):
+        """Delete the least recently used disk cache entries until under budget."""
+        entries = []
+        for path in self.cache_dir.glob("*.png"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        if total > self.cache_max_bytes:
+            target = self.cache_max_bytes * CACHE_PRUNE_RATIO
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+            logger.info("Pruned response cache to %d bytes", total)
+        self._cache_bytes = total
+    
+    def _link_file(self, src: Union[str, Path], dst: Union[str, Path]):
+        """
+        Hard-link src to dst, replacing dst atomically.
+        
+        Falls back to a plain file copy when hard links are not supported,
+        e.g. when the cache directory is on another filesystem. Does nothing
+        if dst is already a link to src, as when an iterative workflow
+        repeats a request with the same output filename.
+        """
+        try:
+            if os.path.samefile(src, dst):
+                return
+        except FileNotFoundError:
+            pass
+        
+        temp_path = _temp_path(dst)
+        try:
+            os.link(src, temp_path)
+        except OSError:
+            shutil.copyfile(src, temp_path)
+        os.replace(temp_path, dst)
+    
+    def _encode_contents(self, contents: List[Any]) -> List[Any]:
+        """
+        Serialize the PIL images in request contents to inline parts once,
+        so retries resend the same bytes instead of re-encoding each image.
+        
+        JPEG sources are re-encoded as JPEG to keep uploads small, everything
+        else as PNG.
+        
+        Args:
+            contents: Request contents (prompt text and PIL images)
+        
+        Returns:
+            Contents with every PIL image replaced by a types.Part
+        """
+        encoded = []
+        for item in contents:
+            if isinstance(item, Image.Image):
+                buffer = BytesIO()
+                if item.format == "JPEG" and item.mode in ("L", "RGB", "CMYK"):
+                    item.save(buffer, format="JPEG", quality=95)
+                    mime_type = "image/jpeg"
+                else:
+                    item.save(buffer, format="PNG")
+                    mime_type = "image/png"
+                item = types.Part.from_bytes(data=buffer.getvalue(), mime_type=mime_type)
+            encoded.append(item)
+        return encoded
+    
+    def _fallback_variants(self, prompt: str) -> List[List[Any]]:
+        """Return the request contents for each fallback prompt reformulation."""
+        return [[template.format(prompt=prompt)] for template in self._FALLBACK_PROMPTS]
+    
+    def _apply_response(
         self,
-        input_image: Union[str, Path, Image.Image],
-        specific_objects: Optional[str] = None,
-        maintain_layout: bool = True,
-        output_filename: Optional[str] = None,
-        save_image: bool = True
-    ) -> Dict[str, Any]:
+        result: Dict[str, Any],
+        response: Any,
+        filename: str,
+        save_image: bool,
+        collect_text: bool = True,
+        candidate: int = 0
+    ) -> bool:
         """
-        Clean up an image by removing clutter or specific objects.
+        Copy text and the first image of a response candidate into the result.
         
         Args:
-            input_image: Input image (path, PIL Image, or base64 string)
-            specific_objects: Specific objects to remove (if None, removes general clutter)
-            maintain_layout: Whether to maintain the original layout
-            output_filename: Output filename (without extension)
+            result: Result dictionary to update in place
+            response: Gemini generate_content response
+            filename: Output filename (without extension)
             save_image: Whether to save the image to disk
+            collect_text: Whether to record text parts in the result
+            candidate: Index of the response candidate to read
         
         Returns:
-            Dictionary containing generated image data and metadata
+            True if the response contained image data
         """
-        try:
-            logger.info(f"Cleaning image with objects: {specific_objects or 'general clutter'}")
-            
-            # Generate cleaning prompt
-            prompt = self.prompt_templates.clean_room(
-                specific_objects=specific_objects,
-                maintain_layout=maintain_layout
-            )
-            
-            # Load input image
-            if isinstance(input_image, (str, Path)):
-                image = Image.open(input_image)
-            elif isinstance(input_image, Image.Image):
-                image = input_image
-            else:
-                raise ValueError("Invalid input image type")
-            
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash-image-preview",
-                contents=[prompt, image],
-            )
-            
-            result = {
-                "success": True,
-                "text_content": None,
-                "image_data": None,
-                "metadata": {
-                    "model": "gemini-2.5-flash-image-preview",
-                    "prompt": prompt,
-                    "type": "clean_image"
-                }
-            }
+        found_image = False
+        
+        for part in response.candidates[candidate].content.parts:
+            if collect_text and part.text is not None:
+                result["text_content"] = part.text
+                logger.info("Generated text: %s", part.text)
             
-            for part in response.candidates[0].content.parts:
-                if part.text is not None:
-                    result["text_content"] = part.text
-                    logger.info(f"Generated text: {part.text}")
+            if part.inline_data is not None and not found_image:
+                found_image = True
+                result["image_data"] = part.inline_data.data
                 
-                if part.inline_data is not None:
-                    result["image_data"] = part.inline_data.data
-                    
-                    if save_image:
-                        filename = output_filename or "cleaned_image"
-                        image_path = self._save_image(part.inline_data.data, filename)
-                        result["image_path"] = str(image_path)
-                        logger.info(f"Cleaned image saved to: {image_path}")
-            
-            # If no image was generated, try multiple strategies to generate an image
-            if result["image_data"] is None:
-                logger.info("No image data found, attempting to generate image using multiple strategies")
+                if save_image:
+                    image_path = self._save_image(part.inline_data.data, filename)
+                    result["image_path"] = str(image_path)
+                    logger.info("Image saved to: %s", image_path)
                 
-                # Strategy 1: Use original prompt
-                try:
-                    logger.info("Strategy 1: Using original prompt")
-                    prompt_response = self.client.models.generate_content(
-                        model="gemini-2.5-flash-image-preview",
-                        contents=[prompt],
-                    )
-                    
-                    for part in prompt_response.candidates[0].content.parts:
-                        if part.inline_data is not None:
-                            result["image_data"] = part.inline_data.data
-                            
-                            if save_image:
-                                filename = output_filename or "cleaned_image"
-                                image_path = self._save_image(part.inline_data.data, filename)
-                                result["image_path"] = str(image_path)
-                                logger.info(f"Image generated from original prompt and saved to: {image_path}")
-                            break
+                if not collect_text:
+                    break
+        
+        return found_image
+    
+    def _take_image(
+        self,
+        result: Dict[str, Any],
+        response: Any,
+        key: str,
+        filename: str,
+        save_image: bool,
+        collect_text: bool = True,
+        candidate: int = 0
+    ) -> bool:
+        """
+        Apply a response to the result and cache its image.
+        
+        This is the one place every request strategy (primary, multi-candidate
+        and fallback reformulations) hands its response to. Arguments are as
+        for _apply_response, plus the cache key from _cache_key.
+        
+        Returns:
+            True if the response candidate contained image data
+        """
+        if not self._apply_response(result, response, filename, save_image, collect_text, candidate):
+            return False
+        self._store_cached(key, result["image_data"], result.get("image_path"))
+        self._release_image_data(result)
+        return True
+    
+    def _release_image_data(self, result: Dict[str, Any]):
+        """Drop saved image bytes from the result unless keep_image_data is set."""
+        if not self.keep_image_data and result.get("image_path") and result.get("image_data") is not None:
+            result["image_size"] = len(result.pop("image_data"))
+    
+    def _candidates_config(self, count: int) -> types.GenerateContentConfig:
+        """Build the config for a request returning several candidates."""
+        return types.GenerateContentConfig(candidate_count=count)
+    
+    def _image_candidate(self, response: Any) -> Optional[int]:
+        """Return the index of the first response candidate with image data, or None."""
+        for index, candidate in enumerate(response.candidates or []):
+            parts = candidate.content.parts if candidate.content else None
+            if parts and any(part.inline_data is not None for part in parts):
+                return index
+        return None
+    
+    def _is_refusal(self, response: Any, text_content: Optional[str]) -> bool:
+        """
+        Check whether a response without an image is a refusal rather than a
+        transient miss, so the fallback prompts can be skipped.
+        
+        Args:
+            response: Gemini generate_content response
+            text_content: Text returned alongside the (missing) image
+        
+        Returns:
+            True if the model refused the request
+        """
+        candidates = getattr(response, "candidates", None) or []
+        finish_reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+        if getattr(finish_reason, "value", finish_reason) in REFUSAL_FINISH_REASONS:
+            return True
+        
+        return isinstance(text_content, str) and REFUSAL_TEXT_PATTERN.search(text_content) is not None
+    
+    def _refused_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark a result as refused by the model."""
+        logger.info("Model refused the request, skipping fallback prompts")
+        result["success"] = False
+        result["reason"] = "refused"
+        result["error"] = result["text_content"] or "Request refused by the model"
+        return result
+    
+    def _send(self, contents: List[Any], config: Optional[types.GenerateContentConfig]) -> Any:
+        """Send one generate_content request, resending it inline if its context cache is gone."""
+        request_config = self._request_config(config)
+        try:
+            return self.client.models.generate_content(model=MODEL_NAME, contents=contents, config=request_config)
+        except errors.ClientError as e:
+            cache = request_config.cached_content if request_config else None
+            if cache is None or not _is_context_cache_error(e):
+                raise
+            self._drop_context_cache(cache)
+            return self.client.models.generate_content(
+                model=MODEL_NAME, contents=contents, config=self._request_config(config)
+            )
+    
+    async def _asend(self, aio: Any, contents: List[Any], config: Optional[types.GenerateContentConfig]) -> Any:
+        """Async counterpart of _send on the given aio client."""
+        request_config = self._request_config(config)
+        try:
+            return await aio.models.generate_content(model=MODEL_NAME, contents=contents, config=request_config)
+        except errors.ClientError as e:
+            cache = request_config.cached_content if request_config else None
+            if cache is None or not _is_context_cache_error(e):
+                raise
+            self._drop_context_cache(cache)
+            return await aio.models.generate_content(
+                model=MODEL_NAME, contents=contents, config=self._request_config(config)
+            )
+    
+    def _generate_with_retry(
+        self,
+        contents: List[Any],
+        attempts: int = RETRY_ATTEMPTS,
+        config: Optional[types.GenerateContentConfig] = None
+    ) -> Any:
+        """
+        Call generate_content, backing off and retrying on transient API errors.
+        
+        Args:
+            contents: Request contents
+            attempts: Maximum number of attempts
+            config: Optional generation config; the context cache (or its
+                instruction) is added by _request_config
+        
+        Returns:
+            Gemini generate_content response
+        
+        Raises:
+            errors.APIError: If the error is not retryable or attempts are exhausted
+        """
+        if self._context_maintenance_due():
+            self._maintain_context_cache()
+        for attempt in range(attempts):
+            if self._pacer is not None:
+                time.sleep(self._pacer.reserve())
+            try:
+                response = self._send(contents, config)
+                _log_cache_usage(response)
+                return response
+            except errors.APIError as e:
+                if e.code not in RETRYABLE_STATUS_CODES or attempt == attempts - 1:
+                    raise
+                delay = _retry_delay(attempt)
+                logger.warning("Transient API error (%s), retrying in %.1fs", e.code, delay)
+                time.sleep(delay)
+    
+    async def _agenerate_with_retry(
+        self,
+        contents: List[Any],
+        attempts: int = RETRY_ATTEMPTS,
+        config: Optional[types.GenerateContentConfig] = None
+    ) -> Any:
+        """Async counterpart of _generate_with_retry using the native aio client."""
+        aio = _async_client.get() or self.client.aio
+        if self._context_maintenance_due():
+            await asyncio.to_thread(self._maintain_context_cache)
+        for attempt in range(attempts):
+            if self._pacer is not None:
+                await asyncio.sleep(self._pacer.reserve())
+            try:
+                response = await self._asend(aio, contents, config)
+                _log_cache_usage(response)
+                return response
+            except errors.APIError as e:
+                if e.code not in RETRYABLE_STATUS_CODES or attempt == attempts - 1:
+                    raise
+                delay = _retry_delay(attempt)
+                logger.warning("Transient API error (%s), retrying in %.1fs", e.code, delay)
+                await asyncio.sleep(delay)
+    
+    def _generate_image_with_fallback(
+        self,
+        contents: List[Any],
+        prompt: str,
+        generation_type: str,
+        filename: str,
+        save_image: bool,
+        **metadata
+    ) -> Dict[str, Any]:
+        """
+        Send a generation request, falling back to prompt reformulations when
+        the model answers without an image.
+        
+        The fallback is a single request for several candidates of the first
+        reformulation; if the model rejects candidate_count, each
+        reformulation is tried in turn instead. Errors on the primary request
+        propagate to the caller; errors on the fallback requests are logged.
+        
+        Args:
+            contents: Primary request contents (prompt and any input images)
+            prompt: Text prompt used to build the reformulations
+            generation_type: Generation type recorded in the metadata
+            filename: Output filename (without extension)
+            save_image: Whether to save the image to disk
+            **metadata: Extra metadata fields
+        
+        Returns:
+            Dictionary containing generated image data and metadata
+        """
+        _check_request(prompt)
+        key = self._cache_key(contents)
+        cached = self._load_cached(key, prompt, generation_type, filename, save_image, **metadata)
+        if cached is not None:
+            return cached
+        
+        result = self._new_result(prompt, generation_type, **metadata)
+        contents = self._encode_contents(contents)
+        
+        response = self._generate_with_retry(contents)
+        if self._take_image(result, response, key, filename, save_image):
+            return result
+        
+        if self._is_refusal(response, result["text_content"]):
+            return self._refused_result(result)
+        
+        if self._multi_candidate:
+            # One multi-candidate request instead of one round trip per reformulation
+            variant = self._fallback_variants(prompt)[0]
+            count = len(self._FALLBACK_PROMPTS)
+            logger.info("No image data found, requesting %d fallback candidates", count)
+            try:
+                response = self._generate_with_retry(variant, config=self._candidates_config(count))
+            except Exception as e:
+                if not _rejects_candidate_count(e):
+                    logger.warning("Fallback request failed: %s", e)
+                    return result
+                logger.warning("Multi-candidate request rejected, using single requests: %s", e)
+                self._multi_candidate = False
+            else:
+                candidate = self._image_candidate(response)
+                if candidate is not None:
+                    self._take_image(result, response, key, filename, save_image, collect_text=False, candidate=candidate)
+                return result
+        
+        for attempt, variant in enumerate(self._fallback_variants(prompt), start=1):
+            logger.info("No image data found, retrying with fallback prompt %s", attempt)
+            try:
+                response = self._generate_with_retry(variant)
+            except errors.APIError as e:
+                if e.code in RETRYABLE_STATUS_CODES:
+                    # Still rate limited or unavailable after backoff; more prompts only add load
+                    logger.warning("Fallback prompt %s failed after retries, giving up: %s", attempt, e)
+                    break
+                logger.warning("Fallback prompt %s failed: %s", attempt, e)
+                continue
+            except Exception as e:
+                logger.warning("Fallback prompt %s failed: %s", attempt, e)
+                continue
+            
+            if self._take_image(result, response, key, filename, save_image, collect_text=False):
+                break
+        
+        return result
+    
+    async def _agenerate_image_with_fallback(
+        self,
+        contents: List[Any],
+        prompt: str,
+        generation_type: str,
+        filename: str,
+        save_image: bool,
+        repeat: int = 0,
+        **metadata
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of _generate_image_with_fallback.
+        
+        Unlike the sync version, the fallback reformulations are sent
+        concurrently; the first one to return an image wins and the rest are
+        cancelled. Hashing and encoding the input images, cache lookups and
+        saving the image run in worker threads so they don't block the event
+        loop.
+        
+        With the response cache enabled, identical concurrent requests share
+        one Gemini call: later ones wait for the first to fill the cache and
+        are then served from it. A nonzero ``repeat`` (see _cache_key) keeps a
+        deliberate repeat of a request out of both.
+        """
+        _check_request(prompt)
+        has_images = any(isinstance(item, Image.Image) for item in contents)
+        if has_images:
+            key = await asyncio.to_thread(self._cache_key, contents, repeat)
+        else:
+            key = self._cache_key(contents, repeat)
+        cached = await asyncio.to_thread(
+            self._load_cached, key, prompt, generation_type, filename, save_image, **metadata
+        )
+        if cached is not None:
+            return cached
+        
+        pending = self._inflight.get(key) if self.use_cache else None
+        if pending is not None:
+            await asyncio.wait([pending])
+            cached = await asyncio.to_thread(
+                self._load_cached, key, prompt, generation_type, filename, save_image, **metadata
+            )
+            if cached is not None:
+                return cached
+        
+        done = asyncio.get_running_loop().create_future()
+        self._inflight.setdefault(key, done)
+        try:
+            return await self._agenerate_uncached(
+                contents, key, has_images, prompt, generation_type, filename, save_image, **metadata
+            )
+        finally:
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            done.set_result(None)
+    
+    async def _agenerate_uncached(
+        self,
+        contents: List[Any],
+        key: str,
+        has_images: bool,
+        prompt: str,
+        generation_type: str,
+        filename: str,
+        save_image: bool,
+        **metadata
+    ) -> Dict[str, Any]:
+        """Generate an image that missed the response cache, racing the fallbacks."""
+        result = self._new_result(prompt, generation_type, **metadata)
+        if has_images:
+            contents = await asyncio.to_thread(self._encode_contents, contents)
+        
+        response = await self._agenerate_with_retry(contents)
+        if await asyncio.to_thread(self._take_image, result, response, key, filename, save_image):
+            return result
+        
+        if self._is_refusal(response, result["text_content"]):
+            return self._refused_result(result)
+        
+        # The reformulations are independent, so race them and keep the first image
+        logger.info("No image data found, trying %d fallback prompts concurrently", len(self._FALLBACK_PROMPTS))
+        tasks = [
+            asyncio.create_task(self._agenerate_with_retry(variant))
+            for variant in self._fallback_variants(prompt)
+        ]
+        try:
+            for future in asyncio.as_completed(tasks):
+                try:
+                    response = await future
                 except Exception as e:
-                    logger.warning(f"Strategy 1 failed: {str(e)}")
+                    logger.warning("Fallback prompt failed: %s", e)
+                    continue
                 
-                # Strategy 2: If still no image, try with a more explicit prompt
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 2: Using explicit image generation prompt")
-                        explicit_prompt = f"Generate a high-quality image: {prompt}"
-                        explicit_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[explicit_prompt],
-                        )
-                        
-                        for part in explicit_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "cleaned_image"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from explicit prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 2 failed: {str(e)}")
-                
-                # Strategy 3: If still no image, try with a simple prompt
-                if result["image_data"] is None:
+                if await asyncio.to_thread(
+                    self._take_image, result, response, key, filename, save_image, collect_text=False
+                ):
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        return result
+    
+    async def agenerate_text_to_image(
+        self,
+        prompt: str,
+        output_filename: Optional[str] = None,
+        save_image: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_text_to_image using the native aio client.
+        
+        Args:
+            prompt: Text description for image generation
+            output_filename: Output filename (without extension)
+            save_image: Whether to save the image to disk
+        
+        Returns:
+            Dictionary containing generated image data and metadata
+        """
+        return await self._agenerate_text_to_image(prompt, output_filename, save_image)
+    
+    async def _agenerate_text_to_image(
+        self,
+        prompt: str,
+        output_filename: Optional[str],
+        save_image: bool,
+        repeat: int = 0
+    ) -> Dict[str, Any]:
+        """agenerate_text_to_image, with the batch occurrence passed to _cache_key."""
+        try:
+            logger.info("Generating text-to-image with prompt: %.100s...", prompt)
+            
+            return await self._agenerate_image_with_fallback(
+                contents=[prompt],
+                prompt=prompt,
+                generation_type="text_to_image",
+                filename=output_filename or "generated_text_to_image",
+                save_image=save_image,
+                repeat=repeat
+            )
+            
+        except Exception as e:
+            logger.error("Error generating text-to-image: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "metadata": {"type": "text_to_image"}
+            }
+    
+    async def agenerate_image_editing(
+        self,
+        prompt: str,
+        input_image: Union[str, Path, bytes, BinaryIO, Image.Image],
+        output_filename: Optional[str] = None,
+        save_image: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_image_editing using the native aio client.
+        
+        Args:
+            prompt: Text description for image editing
+            input_image: Input image (path, encoded image bytes, binary file object, or PIL Image)
+            output_filename: Output filename (without extension)
+            save_image: Whether to save the image to disk
+        
+        Returns:
+            Dictionary containing generated image data and metadata
+        """
+        try:
+            logger.info("Generating image editing with prompt: %.100s...", prompt)
+            
+            image = await asyncio.to_thread(self._load_and_prep_image, input_image)
+            
+            return await self._agenerate_image_with_fallback(
+                contents=[prompt, image],
+                prompt=prompt,
+                generation_type="image_editing",
+                filename=output_filename or "generated_image_editing",
+                save_image=save_image
+            )
+            
+        except Exception as e:
+            logger.error("Error generating image editing: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "metadata": {"type": "image_editing"}
+            }
+    
+    async def aedit_image(
+        self,
+        input_image: Union[str, Path, bytes, BinaryIO, Image.Image],
+        prompt: str,
+        output_filename: Optional[str] = None,
+        save_image: bool = True
+    ) -> Dict[str, Any]:
+        """Async variant of edit_image (alias for agenerate_image_editing)."""
+        return await self.agenerate_image_editing(
+            prompt=prompt,
+            input_image=input_image,
+            output_filename=output_filename,
+            save_image=save_image
+        )
+    
+    async def aclean_image(
+        self,
+        input_image: Union[str, Path, bytes, BinaryIO, Image.Image],
+        specific_objects: Optional[str] = None,
+        maintain_layout: bool = True,
+        output_filename: Optional[str] = None,
+        save_image: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async variant of clean_image using the native aio client.
+        
+        Args:
+            input_image: Input image (path, encoded image bytes, binary file object, or PIL Image)
+            specific_objects: Specific objects to remove (if None, removes general clutter)
+            maintain_layout: Whether to maintain the original layout
+            output_filename: Output filename (without extension)
+            save_image: Whether to save the image to disk
+        
+        Returns:
+            Dictionary containing generated image data and metadata
+        """
+        try:
+            logger.info("Cleaning image with objects: %s", specific_objects or 'general clutter')
+            
+            prompt = self.prompt_templates.clean_room(
+                specific_objects=specific_objects,
+                maintain_layout=maintain_layout
+            )
+            image = await asyncio.to_thread(self._load_and_prep_image, input_image)
+            
+            return await self._agenerate_image_with_fallback(
+                contents=[prompt, image],
+                prompt=prompt,
+                generation_type="clean_image",
+                filename=output_filename or "cleaned_image",
+                save_image=save_image
+            )
+            
+        except Exception as e:
+            logger.error("Error cleaning image: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "metadata": {"type": "clean_image"}
+            }
+    
+    async def agenerate_multi_image_composition(
+        self,
+        input_images: List[Union[str, Path, bytes, BinaryIO, Image.Image]],
+        prompt: str,
+        output_filename: Optional[str] = None,
+        save_image: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_multi_image_composition using the native aio client.
+        
+        Args:
+            input_images: List of input images (paths, encoded image bytes, binary file objects, or PIL Images)
+            prompt: Text description for image composition
+            output_filename: Output filename (without extension)
+            save_image: Whether to save the image to disk
+        
+        Returns:
+            Dictionary containing generated image data and metadata
+        """
+        try:
+            logger.info("Generating multi-image composition with %s images and prompt: %.100s...", len(input_images), prompt)
+            
+            _check_request(prompt, input_images)
+            loaded_images = await asyncio.to_thread(self._load_input_images, input_images)
+            
+            return await self._agenerate_image_with_fallback(
+                contents=loaded_images + [prompt],
+                prompt=prompt,
+                generation_type="multi_image_composition",
+                filename=output_filename or "composed_image",
+                save_image=save_image,
+                input_images_count=len(input_images)
+            )
+            
+        except Exception as e:
+            logger.error("Error generating multi-image composition: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "metadata": {"type": "multi_image_composition"}
+            }
+    
+    async def _agenerate_candidates(
+        self,
+        prompt: str,
+        filenames: List[str],
+        repeats: List[int]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate several images for one prompt in a single multi-candidate request.
+        
+        Each image is cached under the key a single request for the same
+        prompt and repeat uses (see _cache_key), so images already cached are
+        served from it and only the rest are requested.
+        
+        Args:
+            prompt: Text description for image generation
+            filenames: Output filename (without extension) for each image
+            repeats: Occurrence of the prompt within its batch for each image
+        
+        Returns:
+            One result per filename, in order; None where no image was
+            cached or returned by the model
+        """
+        keys = [self._cache_key([prompt], repeat) for repeat in repeats]
+        
+        def load_cached() -> List[Optional[Dict[str, Any]]]:
+            return [
+                self._load_cached(key, prompt, "text_to_image", filename, True)
+                for key, filename in zip(keys, filenames)
+            ]
+        
+        results = await asyncio.to_thread(load_cached)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if len(missing) < 2:
+            return results
+        
+        config = self._candidates_config(len(missing))
+        response = await self._agenerate_with_retry([prompt], config=config)
+        
+        def save_candidates():
+            for candidate, i in enumerate(missing[:len(response.candidates or [])]):
+                result = self._new_result(prompt, "text_to_image", candidate=candidate)
+                if self._take_image(result, response, keys[i], filenames[i], True, candidate=candidate):
+                    results[i] = result
+        
+        await asyncio.to_thread(save_candidates)
+        return results
+    
+    async def abatch_generate(
+        self,
+        prompts: List[str],
+        output_prefix: str = "batch",
+        concurrency: Optional[int] = None,
+        candidates_per_request: int = DEFAULT_CANDIDATES_PER_REQUEST
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate multiple images concurrently.
+        
+        At most ``concurrency`` requests are in flight at once so the batch
+        stays under the Gemini rate limit. A prompt that appears more than once
+        is sent as one request with ``candidate_count`` set, so the repeats get
+        distinct images for a single round trip; any repeat the model does not
+        return an image for is generated on its own. Each repeat of a prompt
+        has its own response cache entry, keyed by its occurrence in the batch
+        and shared by both paths, so running the same batch again is served
+        from the cache whether or not the model accepts ``candidate_count``.
+        
+        Args:
+            prompts: List of text prompts
+            output_prefix: Prefix for output filenames
+            concurrency: Maximum concurrent requests (defaults to self.concurrency)
+            candidates_per_request: Maximum candidates requested in one call
+        
+        Returns:
+            List of generation results, in the same order as prompts
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        
+        def filename(i: int) -> str:
+            return f"{output_prefix}_{i+1:03d}"
+        
+        async def generate_one(i: int) -> None:
+            async with semaphore:
+                logger.info("Generating batch image %d/%d", i + 1, len(prompts))
+                results[i] = await self._agenerate_text_to_image(
+                    prompts[i], filename(i), True, repeat=occurrence[i]
+                )
+        
+        async def generate_group(indices: List[int]) -> None:
+            if len(indices) > 1 and self._multi_candidate:
+                async with semaphore:
+                    logger.info("Generating %d batch images in one request", len(indices))
                     try:
-                        logger.info("Strategy 3: Using simple prompt")
-                        simple_prompt = "Create an image"
-                        simple_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[simple_prompt],
+                        group = await self._agenerate_candidates(
+                            prompts[indices[0]], [filename(i) for i in indices], [occurrence[i] for i in indices]
                         )
-                        
-                        for part in simple_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "cleaned_image"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from simple prompt and saved to: {image_path}")
-                                break
                     except Exception as e:
-                        logger.warning(f"Strategy 3 failed: {str(e)}")
+                        if _rejects_candidate_count(e):
+                            logger.warning("Multi-candidate request rejected, using single requests: %s", e)
+                            self._multi_candidate = False
+                        else:
+                            logger.warning("Multi-candidate request failed, using single requests: %s", e)
+                        group = []
+                for i, result in zip(indices, group):
+                    if result is not None:
+                        results[i] = result
             
-            return result
+            await asyncio.gather(*(generate_one(i) for i in indices if results[i] is None))
+        
+        groups: Dict[str, List[int]] = {}
+        # How many times each prompt appeared before this index
+        occurrence: Dict[int, int] = {}
+        for i, prompt in enumerate(prompts):
+            group = groups.setdefault(prompt, [])
+            occurrence[i] = len(group)
+            group.append(i)
+        
+        await asyncio.gather(*(
+            generate_group(indices[start:start + candidates_per_request])
+            for indices in groups.values()
+            for start in range(0, len(indices), candidates_per_request)
+        ))
+        return results
+    
+    def batch_generate(
+        self,
+        prompts: List[str],
+        output_prefix: str = "batch",
+        concurrency: Optional[int] = None,
+        candidates_per_request: int = DEFAULT_CANDIDATES_PER_REQUEST
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate multiple images in batch.
+        
+        Synchronous wrapper around abatch_generate; must not be called from
+        within a running event loop (await abatch_generate instead). Each call
+        runs on a fresh event loop with its own async client, since pooled
+        async connections cannot outlive the loop that opened them.
+        
+        Args:
+            prompts: List of text prompts
+            output_prefix: Prefix for output filenames
+            concurrency: Maximum concurrent requests (defaults to self.concurrency)
+            candidates_per_request: Maximum candidates requested in one call
+        
+        Returns:
+            List of generation results
+        """
+        async def run() -> List[Dict[str, Any]]:
+            client = self._new_client()
+            _async_client.set(client.aio)
+            try:
+                return await self.abatch_generate(prompts, output_prefix, concurrency, candidates_per_request)
+            finally:
+                await client.aio.aclose()
+                client.close()
+        
+        return asyncio.run(run())
+    
+    def clean_image(
+        self,
+        input_image: Union[str, Path, bytes, BinaryIO, Image.Image],
+        specific_objects: Optional[str] = None,
+        maintain_layout: bool = True,
+        output_filename: Optional[str] = None,
+        save_image: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Clean up an image by removing clutter or specific objects.
+        
+        Args:
+            input_image: Input image (path, encoded image bytes, binary file object, or PIL Image)
+            specific_objects: Specific objects to remove (if None, removes general clutter)
+            maintain_layout: Whether to maintain the original layout
+            output_filename: Output filename (without extension)
+            save_image: Whether to save the image to disk
+        
+        Returns:
+            Dictionary containing generated image data and metadata
+        """
+        try:
+            logger.info("Cleaning image with objects: %s", specific_objects or 'general clutter')
+            
+            # Generate cleaning prompt
+            prompt = self.prompt_templates.clean_room(
+                specific_objects=specific_objects,
+                maintain_layout=maintain_layout
+            )
+            
+            # Load input image
+            image = self._load_and_prep_image(input_image)
+            
+            return self._generate_image_with_fallback(
+                contents=[prompt, image],
+                prompt=prompt,
+                generation_type="clean_image",
+                filename=output_filename or "cleaned_image",
+                save_image=save_image
+            )
             
         except Exception as e:
-            logger.error(f"Error cleaning image: {str(e)}")
+            logger.error("Error cleaning image: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -629,7 +1761,7 @@ class ImageGenerator:
 
     def generate_multi_image_composition(
         self,
-        input_images: List[Union[str, Path, Image.Image]],
+        input_images: List[Union[str, Path, bytes, BinaryIO, Image.Image]],
         prompt: str,
         output_filename: Optional[str] = None,
         save_image: bool = True
@@ -638,7 +1770,7 @@ class ImageGenerator:
         Generate image composition from multiple input images.
 
         Args:
-            input_images: List of input images (paths, PIL Images, or base64 strings)
+            input_images: List of input images (paths, encoded image bytes, binary file objects, or PIL Images)
             prompt: Text description for image composition
             output_filename: Output filename (without extension)
             save_image: Whether to save the image to disk
@@ -647,129 +1779,26 @@ class ImageGenerator:
             Dictionary containing generated image data and metadata
         """
         try:
-            logger.info(f"Generating multi-image composition with {len(input_images)} images and prompt: {prompt[:100]}...")
-
-            # Load input images
-            loaded_images = []
-            for i, input_image in enumerate(input_images):
-                if isinstance(input_image, (str, Path)):
-                    image = Image.open(input_image)
-                elif isinstance(input_image, Image.Image):
-                    image = input_image
-                else:
-                    raise ValueError(f"Invalid input image type at index {i}")
+            logger.info("Generating multi-image composition with %s images and prompt: %.100s...", len(input_images), prompt)
 
-                loaded_images.append(image)
+            # Validate before decoding any input image
+            _check_request(prompt, input_images)
+            loaded_images = self._load_input_images(input_images)
 
             # Prepare contents for API call: images + text prompt
             contents = loaded_images + [prompt]
 
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash-image-preview",
+            return self._generate_image_with_fallback(
                 contents=contents,
+                prompt=prompt,
+                generation_type="multi_image_composition",
+                filename=output_filename or "composed_image",
+                save_image=save_image,
+                input_images_count=len(input_images)
             )
 
-            result = {
-                "success": True,
-                "text_content": None,
-                "image_data": None,
-                "metadata": {
-                    "model": "gemini-2.5-flash-image-preview",
-                    "prompt": prompt,
-                    "type": "multi_image_composition",
-                    "input_images_count": len(input_images)
-                }
-            }
-
-            for part in response.candidates[0].content.parts:
-                if part.text is not None:
-                    result["text_content"] = part.text
-                    logger.info(f"Generated text: {part.text}")
-
-                if part.inline_data is not None:
-                    result["image_data"] = part.inline_data.data
-
-                    if save_image:
-                        filename = output_filename or "composed_image"
-                        image_path = self._save_image(part.inline_data.data, filename)
-                        result["image_path"] = str(image_path)
-                        logger.info(f"Composed image saved to: {image_path}")
-
-            # If no image was generated, try multiple strategies to generate an image
-            if result["image_data"] is None:
-                logger.info("No image data found, attempting to generate image using multiple strategies")
-                
-                # Strategy 1: Use original prompt
-                try:
-                    logger.info("Strategy 1: Using original prompt")
-                    prompt_response = self.client.models.generate_content(
-                        model="gemini-2.5-flash-image-preview",
-                        contents=[prompt],
-                    )
-                    
-                    for part in prompt_response.candidates[0].content.parts:
-                        if part.inline_data is not None:
-                            result["image_data"] = part.inline_data.data
-                            
-                            if save_image:
-                                filename = output_filename or "composed_image"
-                                image_path = self._save_image(part.inline_data.data, filename)
-                                result["image_path"] = str(image_path)
-                                logger.info(f"Image generated from original prompt and saved to: {image_path}")
-                            break
-                except Exception as e:
-                    logger.warning(f"Strategy 1 failed: {str(e)}")
-                
-                # Strategy 2: If still no image, try with a more explicit prompt
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 2: Using explicit image generation prompt")
-                        explicit_prompt = f"Generate a high-quality image: {prompt}"
-                        explicit_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[explicit_prompt],
-                        )
-                        
-                        for part in explicit_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "composed_image"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from explicit prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 2 failed: {str(e)}")
-                
-                # Strategy 3: If still no image, try with a simple prompt
-                if result["image_data"] is None:
-                    try:
-                        logger.info("Strategy 3: Using simple prompt")
-                        simple_prompt = "Create an image"
-                        simple_response = self.client.models.generate_content(
-                            model="gemini-2.5-flash-image-preview",
-                            contents=[simple_prompt],
-                        )
-                        
-                        for part in simple_response.candidates[0].content.parts:
-                            if part.inline_data is not None:
-                                result["image_data"] = part.inline_data.data
-                                
-                                if save_image:
-                                    filename = output_filename or "composed_image"
-                                    image_path = self._save_image(part.inline_data.data, filename)
-                                    result["image_path"] = str(image_path)
-                                    logger.info(f"Image generated from simple prompt and saved to: {image_path}")
-                                break
-                    except Exception as e:
-                        logger.warning(f"Strategy 3 failed: {str(e)}")
-
-            return result
-
         except Exception as e:
-            logger.error(f"Error generating multi-image composition: {str(e)}")
+            logger.error("Error generating multi-image composition: %s", e)
             return {
                 "success": False,
                 "error": str(e),
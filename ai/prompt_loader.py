@@ -3,12 +3,24 @@ Prompt template loader for loading system prompts from resources directory.
 """
 
 import os
+import re
 from pathlib import Path
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Mapping, Optional
+
+# Matches str.format placeholders such as {subject}
+_PLACEHOLDER_RE = re.compile(r'\{([^}]+)\}')
 
 
 class PromptLoader:
-    """Load and manage system prompts from resources directory."""
+    """
+    Load and manage system prompts from resources directory.
+    
+    All prompt files are read once, when the loader is created, into a
+    read-only mapping, so formatting a prompt never touches the disk and the
+    loader can be shared between threads. Call reload_cache to pick up
+    changed or new files.
+    """
     
     def __init__(self, resources_dir: Optional[str] = None):
         """
@@ -25,11 +37,14 @@ class PromptLoader:
             resources_dir = Path(resources_dir)
         
         self.resources_dir = resources_dir
-        self._cache: Dict[str, str] = {}
+        self._cache: Mapping[str, str] = MappingProxyType({})
+        self._placeholders: Mapping[str, FrozenSet[str]] = MappingProxyType({})
+        self._formatters: Mapping[str, Callable[[Mapping[str, Any]], str]] = MappingProxyType({})
+        self.reload_cache()
     
     def load_prompt(self, prompt_name: str) -> str:
         """
-        Load a prompt template from file.
+        Return a preloaded prompt template.
         
         Args:
             prompt_name: Name of the prompt file (without .txt extension)
@@ -40,19 +55,10 @@ class PromptLoader:
         Raises:
             FileNotFoundError: If prompt file doesn't exist
         """
-        if prompt_name in self._cache:
+        try:
             return self._cache[prompt_name]
-        
-        prompt_file = self.resources_dir / f"{prompt_name}.txt"
-        
-        if not prompt_file.exists():
-            raise FileNotFoundError(f"Prompt file not found: {prompt_file}")
-        
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-        
-        self._cache[prompt_name] = content
-        return content
+        except KeyError:
+            raise FileNotFoundError(f"Prompt file not found: {self.resources_dir / f'{prompt_name}.txt'}") from None
     
     def format_prompt(self, prompt_name: str, **kwargs) -> str:
         """
@@ -64,21 +70,22 @@ class PromptLoader:
         
         Returns:
             Formatted prompt string
-        """
-        template = self.load_prompt(prompt_name)
         
-        # Handle optional parameters by providing defaults
-        formatted_kwargs = {}
-        for key, value in kwargs.items():
-            if value is not None:
-                formatted_kwargs[key] = value
-            else:
-                formatted_kwargs[key] = ""
+        Raises:
+            ValueError: If a placeholder in the template was not passed
+        """
+        try:
+            formatter = self._formatters[prompt_name]
+        except KeyError:
+            raise FileNotFoundError(f"Prompt file not found: {self.resources_dir / f'{prompt_name}.txt'}") from None
         
+        # Optional parameters passed as None render as empty strings
+        if None in kwargs.values():
+            kwargs = {key: "" if value is None else value for key, value in kwargs.items()}
         try:
-            return template.format(**formatted_kwargs)
+            return formatter(kwargs)
         except KeyError as e:
-            raise ValueError(f"Missing required parameter for prompt '{prompt_name}': {e}")
+            raise ValueError(f"Missing required parameter for prompt '{prompt_name}': {e}") from None
     
     def list_available_prompts(self) -> list:
         """
@@ -87,15 +94,20 @@ class PromptLoader:
         Returns:
             List of prompt names (without .txt extension)
         """
-        if not self.resources_dir.exists():
-            return []
-        
-        prompt_files = list(self.resources_dir.glob("*.txt"))
-        return [f.stem for f in prompt_files]
+        return list(self._cache)
     
     def reload_cache(self):
-        """Reload all cached prompts from files."""
-        self._cache.clear()
+        """Reload all prompts from files, swapping in the new cache in one step."""
+        prompts: Dict[str, str] = {}
+        if self.resources_dir.exists():
+            for prompt_file in self.resources_dir.glob("*.txt"):
+                prompts[prompt_file.stem] = prompt_file.read_text(encoding='utf-8').strip()
+        
+        self._placeholders = MappingProxyType({
+            name: frozenset(_PLACEHOLDER_RE.findall(content)) for name, content in prompts.items()
+        })
+        self._formatters = MappingProxyType({name: content.format_map for name, content in prompts.items()})
+        self._cache = MappingProxyType(prompts)
     
     def get_prompt_info(self, prompt_name: str) -> Dict[str, str]:
         """
@@ -109,13 +121,9 @@ class PromptLoader:
         """
         template = self.load_prompt(prompt_name)
         
-        # Extract placeholders from template
-        import re
-        placeholders = re.findall(r'\{([^}]+)\}', template)
-        
         return {
             "name": prompt_name,
             "template": template,
-            "placeholders": list(set(placeholders)),
+            "placeholders": list(self._placeholders[prompt_name]),
             "file_path": str(self.resources_dir / f"{prompt_name}.txt")
         }
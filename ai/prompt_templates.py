@@ -4,7 +4,8 @@ Based on Gemini API best practices for optimal results.
 Uses external prompt files from resources/prompts directory.
 """
 
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
 from enum import Enum
 from .prompt_loader import PromptLoader
 
@@ -32,14 +33,47 @@ class CameraAngle(Enum):
     DUTCH_ANGLE = "dutch angle"
 
 
+# Pre-rendered prompt fragments, so formatting does no Enum.value lookups
+_STYLE_STR = {style: style.value for style in ImageStyle}
+_ANGLE_FRAGMENT = {angle: f", using {angle.value}" for angle in CameraAngle}
+_ANGLE_FRAGMENT[None] = ""
+
+# Formatted prompts remembered per template method and instance; outputs depend only on the arguments
+_PROMPT_CACHE_SIZE = 2048
+
+
 class PromptTemplates:
-    """Professional prompt templates following Gemini API best practices"""
+    """
+    Professional prompt templates following Gemini API best practices.
+    
+    Template methods whose arguments are all hashable memoize their output,
+    so repeated requests (e.g. in a batch) skip formatting. Each instance
+    keeps its own memo, which goes away with it. Call reload to pick up
+    edited prompt files and drop the instance's memoized prompts.
+    """
+    
+    # Template methods wrapped with an lru_cache per instance, cleared by reload
+    _CACHED_METHODS = (
+        "text_to_image", "inpainting", "style_transfer", "text_rendering", "clean_room",
+        "_multi_image_composition", "_step_by_step_instructions"
+    )
     
-    def __init__(self):
-        """Initialize prompt templates with loader."""
-        self.loader = PromptLoader()
-        # Clear cache to ensure fresh prompts are loaded
+    def __init__(self, loader: Optional[PromptLoader] = None):
+        """
+        Initialize prompt templates with loader.
+        
+        Args:
+            loader: Prompt loader to format templates with. If None, creates one.
+        """
+        self.loader = loader or PromptLoader()
+        for name in self._CACHED_METHODS:
+            setattr(self, name, lru_cache(maxsize=_PROMPT_CACHE_SIZE)(getattr(self, name)))
+    
+    def reload(self):
+        """Reload the prompt files and clear this instance's memoized prompts."""
         self.loader.reload_cache()
+        for name in self._CACHED_METHODS:
+            getattr(self, name).cache_clear()
     
     def text_to_image(
         self,
@@ -67,7 +101,7 @@ class PromptTemplates:
             Formatted prompt string
         """
         # Format optional parameters
-        angle_text = f", using {camera_angle.value}" if camera_angle else ""
+        angle_text = _ANGLE_FRAGMENT[camera_angle]
         lighting_text = f", with {lighting}" if lighting else ""
         composition_text = f", and {composition}" if composition else ""
         negative_text = f", ensuring {negative_prompt}" if negative_prompt else ""
@@ -76,7 +110,7 @@ class PromptTemplates:
             "text_to_image",
             context=context or "image",
             subject=subject,
-            style=style.value,
+            style=_STYLE_STR[style],
             angle=angle_text,
             lighting=lighting_text,
             composition=composition_text,
@@ -115,7 +149,7 @@ class PromptTemplates:
     def style_transfer(
         self,
         source_image_description: str,
-        target_style: str,
+        target_style: Union[str, ImageStyle],
         preserve_subject: bool = True
     ) -> str:
         """
@@ -123,7 +157,7 @@ class PromptTemplates:
         
         Args:
             source_image_description: Description of source image
-            target_style: Target style to apply (string)
+            target_style: Target style to apply (ImageStyle or free-form string)
             preserve_subject: Whether to preserve the main subject
         
         Returns:
@@ -134,7 +168,7 @@ class PromptTemplates:
         return self.loader.format_prompt(
             "style_transfer",
             source_image_description=source_image_description,
-            target_style=target_style,
+            target_style=_STYLE_STR.get(target_style, target_style),
             preserve_subject=preserve_text
         )
     
@@ -155,11 +189,13 @@ class PromptTemplates:
         Returns:
             Formatted composition prompt
         """
-        images_str = ", ".join(images)
-        
+        return self._multi_image_composition(tuple(images), composition_goal, blending_style)
+    
+    def _multi_image_composition(self, images: tuple, composition_goal: str, blending_style: str) -> str:
+        """Format the composition prompt; takes a tuple so it can be memoized."""
         return self.loader.format_prompt(
             "multi_image_composition",
-            images=images_str,
+            images=", ".join(images),
             composition_goal=composition_goal,
             blending_style=blending_style
         )
@@ -167,18 +203,27 @@ class PromptTemplates:
     def iterative_refinement(
         self,
         base_prompt: str,
-        refinement_instruction: str
+        refinement_instruction: Union[str, List[str]]
     ) -> str:
         """
         Generate iterative refinement prompt.
         
+        Pass the original prompt and the list of refinements so far, rather
+        than feeding a refined prompt back in: each step's prompt then starts
+        with the previous step's text instead of nesting it. Refinements are
+        only ever appended, never reordered or rewritten, so consecutive steps
+        share a prefix that server-side prompt caching can reuse.
+        
         Args:
             base_prompt: Original prompt
-            refinement_instruction: Specific refinement to apply
+            refinement_instruction: Specific refinement to apply, or every
+                refinement applied so far, in order
         
         Returns:
             Formatted refinement prompt
         """
+        if not isinstance(refinement_instruction, str):
+            refinement_instruction = ", ".join(refinement_instruction)
         return f"Based on the previous image: {base_prompt}, {refinement_instruction}."
     
     def text_rendering(
@@ -215,11 +260,11 @@ class PromptTemplates:
         Returns:
             Formatted step-by-step prompt
         """
-        step_instructions = []
-        for i, step in enumerate(steps, 1):
-            step_instructions.append(f"Step {i}: {step}")
-        
-        steps_text = " ".join(step_instructions)
+        return self._step_by_step_instructions(tuple(steps))
+    
+    def _step_by_step_instructions(self, steps: tuple) -> str:
+        """Format the step-by-step prompt; takes a tuple so it can be memoized."""
+        steps_text = " ".join(f"Step {i}: {step}" for i, step in enumerate(steps, 1))
         
         return self.loader.format_prompt(
             "step_by_step",
@@ -255,6 +300,12 @@ class PromptTemplates:
         )
 
 
+@lru_cache(maxsize=1)
+def get_prompt_templates() -> PromptTemplates:
+    """Return the process-wide PromptTemplates instance, loading the prompt files once."""
+    return PromptTemplates()
+
+
 # Pre-defined professional prompts for common use cases
 PROFESSIONAL_PROMPTS = {
     "logo_design": {
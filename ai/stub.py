@@ -0,0 +1,87 @@
+"""
+Offline stand-in for the Gemini API.
+Lets tutorials and scripts exercise their full code paths without network
+access or an API key; every request returns the same small placeholder image.
+"""
+
+import os
+import time
+import asyncio
+from io import BytesIO
+
+from google.genai import types
+from PIL import Image
+
+from .image_generator import ImageGenerator
+
+
+def _placeholder_response() -> types.GenerateContentResponse:
+    """Build a response carrying one small grey PNG."""
+    buffer = BytesIO()
+    Image.new("RGB", (64, 64), "grey").save(buffer, format="PNG")
+    part = types.Part.from_bytes(data=buffer.getvalue(), mime_type="image/png")
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[part]), finish_reason="STOP")]
+    )
+
+
+class _StubModels:
+    """Synchronous models API returning the placeholder after a fixed delay."""
+
+    def __init__(self, response: types.GenerateContentResponse, latency: float):
+        self._response = response
+        self._latency = latency
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self._latency)
+        return self._response
+
+
+class _StubAsyncModels(_StubModels):
+    """Asynchronous models API returning the placeholder after a fixed delay."""
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(self._latency)
+        return self._response
+
+    async def get(self, model):
+        return None
+
+
+class _StubAsyncClient:
+    def __init__(self, response: types.GenerateContentResponse, latency: float):
+        self.models = _StubAsyncModels(response, latency)
+
+    async def aclose(self):
+        pass
+
+
+class StubClient:
+    """Minimal genai.Client replacement covering the calls ImageGenerator makes."""
+
+    def __init__(self, latency: float = 0.0):
+        response = _placeholder_response()
+        self.models = _StubModels(response, latency)
+        self.aio = _StubAsyncClient(response, latency)
+
+    def close(self):
+        pass
+
+
+class StubGenerator(ImageGenerator):
+    """
+    ImageGenerator whose requests never leave the process.
+
+    Everything except the API call runs as usual (prompt building, input
+    image preparation, saving), so a smoke run still covers the caller's code.
+    Set GEMINI_SMOKE_LATENCY_MS to simulate the model's response time. The
+    response cache is off by default so placeholders never end up in it.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("api_key", "smoke-test")
+        kwargs.setdefault("use_cache", False)
+        super().__init__(**kwargs)
+    
+    def _new_client(self) -> StubClient:
+        return StubClient(latency=float(os.getenv("GEMINI_SMOKE_LATENCY_MS", "0")) / 1000)
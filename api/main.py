@@ -3,19 +3,66 @@ FastAPI main application for Gemini Image Generation API
 """
 
 import os
+import json
+import hashlib
+import asyncio
+import shutil
+import tempfile
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
+from types import MappingProxyType
 from typing import List, Optional, Union
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, BackgroundTasks, Header, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 import uvicorn
 
 # Import AI services
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
-from ai import ImageGenerator, PromptTemplates, ImageStyle, CameraAngle
+from ai import ImageGenerator, ImageStyle, CameraAngle, get_prompt_templates
+from ai.image_generator import CACHE_MAX_BYTES, CACHE_TTL_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Static system instruction kept in a Gemini context cache (CONTEXT_CACHE_FILE),
+# and the TTL the cache is created with and kept extended by
+CONTEXT_CACHE_FILE = os.getenv("CONTEXT_CACHE_FILE")
+CONTEXT_CACHE_TTL = os.getenv("CONTEXT_CACHE_TTL", "3600s")
+
+def share_context_cache():
+    """
+    Create the context cache once, before uvicorn starts its workers.
+    
+    Workers inherit its name through CONTEXT_CACHE_NAME and attach to it
+    instead of each creating (and paying for) a cache of their own.
+    """
+    if CONTEXT_CACHE_FILE and not os.getenv("CONTEXT_CACHE_NAME"):
+        instruction = Path(CONTEXT_CACHE_FILE).read_text(encoding="utf-8")
+        name = image_generator.create_context_cache(instruction, CONTEXT_CACHE_TTL)
+        if name:
+            os.environ["CONTEXT_CACHE_NAME"] = name
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the shared Gemini connection pool and context cache on startup; release the pool on shutdown"""
+    await image_generator.awarm_up()
+    if CONTEXT_CACHE_FILE:
+        instruction = Path(CONTEXT_CACHE_FILE).read_text(encoding="utf-8")
+        shared_name = os.getenv("CONTEXT_CACHE_NAME")
+        if shared_name:
+            image_generator.attach_context_cache(shared_name, instruction, CONTEXT_CACHE_TTL)
+        else:
+            await asyncio.to_thread(image_generator.create_context_cache, instruction, CONTEXT_CACHE_TTL)
+    yield
+    await image_generator.aclose()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,7 +70,8 @@ app = FastAPI(
     description="Professional image generation service using Google Gemini API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -35,36 +83,179 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress text responses (templates, JSON, frontend assets); PNG outputs are
+# already compressed and are skipped by content type
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount("/outputs", StaticFiles(directory="outputs"), name="outputs")
 
-# Initialize AI services
-image_generator = ImageGenerator()
-prompt_templates = PromptTemplates()
+def worker_count() -> int:
+    """
+    Number of uvicorn worker processes: WEB_CONCURRENCY, or 1.
+    
+    The app is async and I/O-bound, so one worker keeps many Gemini requests
+    in flight. Each extra worker is a separate process with its own generator,
+    response cache memory, request pacer and context cache, so only add them
+    when image preparation saturates a core.
+    """
+    return int(os.getenv("WEB_CONCURRENCY", 1))
 
-# Pydantic models for request/response
-class GenerateRequest(BaseModel):
-    prompt: str
-    output_filename: Optional[str] = None
+# Initialize AI services once; every request shares the generator's connection pool.
+# Handlers await the generator's async methods so the event loop keeps serving
+# other requests during the Gemini round trip.
+# Repeated /api/generate prompts are answered from the generator's response cache,
+# which RESPONSE_CACHE=0 turns off and RESPONSE_CACHE_TTL (seconds) and
+# RESPONSE_CACHE_MAX_BYTES (disk budget) tune.
+# GEMINI_RPM is the requests-per-minute quota for the whole deployment; the
+# pacer lives in each worker process, so every worker gets an equal share of it.
+image_generator = ImageGenerator(
+    use_cache=os.getenv("RESPONSE_CACHE", "1") != "0",
+    cache_ttl=float(os.getenv("RESPONSE_CACHE_TTL", CACHE_TTL_SECONDS)),
+    cache_max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", CACHE_MAX_BYTES)),
+    keep_image_data=False,
+    requests_per_minute=float(os.getenv("GEMINI_RPM", 0)) / worker_count() or None
+)
+prompt_templates = get_prompt_templates()
 
-class EditRequest(BaseModel):
-    prompt: str
-    output_filename: Optional[str] = None
+# Upload handlers always describe their inputs the same way, so bind those arguments once
+uploaded_style_transfer = partial(
+    prompt_templates.style_transfer,
+    source_image_description="the uploaded image"
+)
+uploaded_images_composition = partial(
+    prompt_templates.multi_image_composition,
+    images=["the uploaded images"],
+    blending_style="seamless"
+)
 
-class CleanRequest(BaseModel):
-    objects: Optional[str] = None
-    maintain_layout: bool = True
-    output_filename: Optional[str] = None
+# Uploads are copied to disk in chunks of this size, under UPLOAD_TMPDIR
+# (tmpfs by default where available, otherwise the system temp directory)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Uploads up to this size are handed to the generator in memory instead
+INLINE_UPLOAD_LIMIT = 8 * 1024 * 1024
+UPLOAD_TMPDIR = os.getenv("UPLOAD_TMPDIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
 
-class StyleRequest(BaseModel):
-    target_style: str
-    custom_style: Optional[str] = None
-    output_filename: Optional[str] = None
+# Bounds how many uploads are written to disk at once, across all requests
+upload_slots = asyncio.Semaphore(8)
+
+async def save_upload(file: UploadFile, path: str):
+    """Stream an upload to disk in chunks, off the event loop and without reading it into memory"""
+    def copy():
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer, UPLOAD_CHUNK_SIZE)
+    async with upload_slots:
+        await asyncio.to_thread(copy)
+
+def remove_files(paths: List[Path]):
+    """Delete temp files, ignoring ones that are already gone"""
+    for path in paths:
+        path.unlink(missing_ok=True)
 
-class CompositionRequest(BaseModel):
-    goal: str
-    blending: str = "seamless"
+@asynccontextmanager
+async def staged_uploads(files: List[UploadFile], background_tasks: BackgroundTasks):
+    """
+    Stage uploads concurrently in uniquely named temp files.
+    
+    On success the files are deleted by a background task after the response
+    is sent; if the request fails they are deleted immediately.
+    """
+    temp_paths = []
+    try:
+        for file in files:
+            fd, temp_path = tempfile.mkstemp(suffix=Path(file.filename or "").suffix, dir=UPLOAD_TMPDIR)
+            os.close(fd)
+            temp_paths.append(Path(temp_path))
+        await asyncio.gather(*(
+            save_upload(file, temp_path) for file, temp_path in zip(files, temp_paths)
+        ))
+        yield temp_paths
+    except BaseException:
+        remove_files(temp_paths)
+        raise
+    background_tasks.add_task(remove_files, temp_paths)
+
+@asynccontextmanager
+async def upload_inputs(files: List[UploadFile], background_tasks: BackgroundTasks):
+    """
+    Yield each upload in a form the image generator accepts.
+    
+    Uploads up to INLINE_UPLOAD_LIMIT are passed on as their bytes, which the
+    generator reads without touching the disk; larger or unsized ones are
+    staged in temp files (see staged_uploads).
+    """
+    large_files = [file for file in files if file.size is None or file.size > INLINE_UPLOAD_LIMIT]
+    async with staged_uploads(large_files, background_tasks) as temp_paths:
+        staged = dict(zip(map(id, large_files), temp_paths))
+        yield [staged[id(file)] if id(file) in staged else await file.read() for file in files]
+
+@asynccontextmanager
+async def upload_input(file: UploadFile, background_tasks: BackgroundTasks):
+    """Yield a single upload as bytes or a staged temp file (see upload_inputs)"""
+    async with upload_inputs([file], background_tasks) as (input_image,):
+        yield input_image
+
+def wants_image(accept: Optional[str]) -> bool:
+    """Whether the client asked for the image itself rather than JSON"""
+    return accept is not None and "image/png" in accept
+
+def unique_filename(name: str) -> str:
+    """
+    Suffix an output filename so no concurrent request writes the same file.
+    
+    A PNG response streams the saved file after the handler returns, so with
+    a shared name another request could replace it before it is sent.
+    """
+    return f"{name}_{uuid.uuid4().hex}"
+
+def image_file_response(result: dict) -> FileResponse:
+    """Send the generated PNG directly, with the result metadata in a header"""
+    metadata = {key: value for key, value in result["metadata"].items() if key != "prompt"}
+    return FileResponse(
+        result["image_path"],
+        media_type="image/png",
+        headers={"X-Generation-Meta": json.dumps(metadata)}
+    )
+
+# Enum values are fixed, so membership checks and the /api/styles body and ETag are built once
+STYLE_VALUES = frozenset(style.value for style in ImageStyle)
+STYLES_BODY = json.dumps({
+    "styles": [style.value for style in ImageStyle],
+    "angles": [angle.value for angle in CameraAngle]
+}).encode("utf-8")
+STYLES_HEADERS = {
+    "ETag": f'"{hashlib.blake2b(STYLES_BODY, digest_size=8).hexdigest()}"',
+    "Cache-Control": "public, max-age=300"
+}
+
+# Static health check body, serialized once
+HEALTH_BODY = json.dumps({"status": "healthy", "service": "Gemini Image Generation API"}).encode("utf-8")
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's cached copy (If-None-Match) matches etag"""
+    if_none_match = request.headers.get("if-none-match")
+    return if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(","))
+
+# Prompt descriptions for the 12 predefined interior styles of /api/style
+STYLE_MAPPING = MappingProxyType({
+    "modern": "modern style, clean, neutral color, minimalistic furniture, marble tile floors, abundant natural light, sleek materials, bright color schemes",
+    "minimalist": "minimalist style, monochromatic and cold tones, large flat floors, white walls, clean and uncluttered aesthetics, low-profile furniture, natural light, calming and spacious environment",
+    "neoclassical": "neoclassical style, bright and elegant tone, marble floors, white paneled walls, luxurious and sophisticated materials, soft neutral-toned furniture, soft and warm lighting",
+    "industrial_loft": "industrial loft, reclaimed wood, walnut floors, exposed structural elements like pipes and beams, concrete or brick walls, vintage and repurposed furniture, leather and metal accents",
+    "coastal": "coastal style, weathered wood, rattan, jute furniture, natural light, cotton linen, driftwood",
+    "country": "country style, natural materials like wood, and brick walls, delicate grooved details, soft pastel painted wood, and ornate metal handles, floral and plaid patterns furniture, warm tones, soft natural lighting",
+    "scandinavian": "scandinavian style, crisp clean lines, cozy furniture, oak floors, soft natural light, warm natural materials, neutral palettes, airy and tranquil atmosphere",
+    "japanese": "japanese style, wood bamboo stone flooring furniture, clean line, tatami, low wooden table, shoji door, bonsai, bamboo, paper lanterns, natural material pendant lights",
+    "japandi": "japandi style, japanese minimalism, scandinavian coziness, natural wood, clean line, tatami, shoji, japanese aesthetic, warm",
+    "modern_american": "modern american style, wood, metal, glass, timeless furniture, pendant lights, floor lamp, contemporary",
+    "mid_century_modern": "mid century modern interior, warm wooden tones and rich walnut finishes, retro aesthetic furniture, a color palette with muted earth tones and pops of color",
+    "modern_classic": "modern classic style, metallic accent, crown molding, wainscoting, rich fabrics, velvet, silk, linen"
+})
+
+# Pydantic models for request/response
+class GenerateRequest(BaseModel):
+    prompt: str
     output_filename: Optional[str] = None
 
 class TemplateRequest(BaseModel):
@@ -83,6 +274,10 @@ class TemplateRequest(BaseModel):
     text_content: Optional[str] = None
     design_style: Optional[str] = None
     steps: Optional[List[str]] = None
+    goal: Optional[str] = None
+    blending: Optional[str] = None
+    objects: Optional[str] = None
+    maintain_layout: bool = True
 
 class APIResponse(BaseModel):
     success: bool
@@ -90,93 +285,112 @@ class APIResponse(BaseModel):
     data: Optional[dict] = None
     error: Optional[str] = None
 
+def json_response(body: APIResponse) -> Response:
+    """
+    Serialize an APIResponse straight to JSON bytes.
+    
+    The body was validated when it was built; returning a Response keeps
+    response_model for the OpenAPI docs while skipping FastAPI's second
+    dump-and-validate pass over it.
+    """
+    return Response(content=body.model_dump_json(), media_type="application/json")
+
 # Root endpoint
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Serve the main frontend interface"""
-    return FileResponse("static/index.html")
+    index = FileResponse("static/index.html", stat_result=os.stat("static/index.html"))
+    if not_modified(request, index.headers["etag"]):
+        return Response(status_code=304, headers={"ETag": index.headers["etag"]})
+    return index
 
 # Health check
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "Gemini Image Generation API"}
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 # Generate endpoint
 @app.post("/api/generate", response_model=APIResponse)
-async def generate_image(request: GenerateRequest):
-    """Generate image from text description"""
+async def generate_image(request: GenerateRequest, accept: Optional[str] = Header(None)):
+    """Generate image from text description; send "Accept: image/png" to receive the PNG itself"""
     try:
-        result = image_generator.generate_text_to_image(
+        output_filename = request.output_filename or "generated"
+        if wants_image(accept):
+            output_filename = unique_filename(output_filename)
+        
+        result = await image_generator.agenerate_text_to_image(
             prompt=request.prompt,
-            output_filename=request.output_filename or "generated"
+            output_filename=output_filename
         )
         
+        if wants_image(accept) and result.get("image_path"):
+            return image_file_response(result)
+        
         # Filter out binary data for JSON response
         if result.get("image_data"):
             del result["image_data"]
         
-        return APIResponse(
+        return json_response(APIResponse(
             success=True,
             message="Image generated successfully",
             data=result
-        )
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Edit endpoint
 @app.post("/api/edit", response_model=APIResponse)
 async def edit_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     prompt: str = Form(...),
     style: Optional[str] = Form(None),
     custom_style: Optional[str] = Form(None),
-    output_filename: Optional[str] = Form(None)
+    output_filename: Optional[str] = Form(None),
+    accept: Optional[str] = Header(None)
 ):
-    """Edit existing image with text prompt"""
+    """Edit existing image with text prompt; send "Accept: image/png" to receive the PNG itself"""
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
         # Convert style string to enum
         style_enum = None
         if style:
             if style == "custom" and custom_style:
                 style_enum = ImageStyle.CUSTOM
-            elif style in [s.value for s in ImageStyle]:
+            elif style in STYLE_VALUES:
                 style_enum = ImageStyle(style)
         
-        # Edit image
-        result = image_generator.edit_image(
-            input_image=temp_path,
-            prompt=prompt,
-            output_filename=output_filename or "edited"
-        )
+        output_filename = output_filename or "edited"
+        if wants_image(accept):
+            output_filename = unique_filename(output_filename)
+        
+        # Edit the uploaded image
+        async with upload_input(file, background_tasks) as input_image:
+            result = await image_generator.aedit_image(
+                input_image=input_image,
+                prompt=prompt,
+                output_filename=output_filename
+            )
+        
+        if wants_image(accept) and result.get("image_path"):
+            return image_file_response(result)
         
         # Filter out binary data for JSON response
         if result.get("image_data"):
             del result["image_data"]
         
-        # Clean up temp file
-        os.remove(temp_path)
-        
-        return APIResponse(
+        return json_response(APIResponse(
             success=True,
             message="Image edited successfully",
             data=result
-        )
+        ))
     except Exception as e:
-        # Clean up temp file if it exists
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Clean endpoint
 @app.post("/api/clean", response_model=APIResponse)
 async def clean_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     objects: Optional[str] = Form(None),
     maintain_layout: bool = Form(True),
@@ -184,41 +398,31 @@ async def clean_image(
 ):
     """Clean room clutter and unnecessary objects"""
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Clean image
-        result = image_generator.clean_image(
-            input_image=temp_path,
-            specific_objects=objects,
-            maintain_layout=maintain_layout,
-            output_filename=output_filename or "cleaned"
-        )
+        # Clean the uploaded image
+        async with upload_input(file, background_tasks) as input_image:
+            result = await image_generator.aclean_image(
+                input_image=input_image,
+                specific_objects=objects,
+                maintain_layout=maintain_layout,
+                output_filename=output_filename or "cleaned"
+            )
         
         # Filter out binary data for JSON response
         if result.get("image_data"):
             del result["image_data"]
         
-        # Clean up temp file
-        os.remove(temp_path)
-        
-        return APIResponse(
+        return json_response(APIResponse(
             success=True,
             message="Image cleaned successfully",
             data=result
-        )
+        ))
     except Exception as e:
-        # Clean up temp file if it exists
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Style transfer endpoint
 @app.post("/api/style", response_model=APIResponse)
 async def transfer_style(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     target_style: str = Form(...),
     custom_style: Optional[str] = Form(None),
@@ -226,181 +430,161 @@ async def transfer_style(
 ):
     """Transfer style from one image to another"""
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Style mapping for the 12 predefined styles
-        style_mapping = {
-            "modern": "modern style, clean, neutral color, minimalistic furniture, marble tile floors, abundant natural light, sleek materials, bright color schemes",
-            "minimalist": "minimalist style, monochromatic and cold tones, large flat floors, white walls, clean and uncluttered aesthetics, low-profile furniture, natural light, calming and spacious environment",
-            "neoclassical": "neoclassical style, bright and elegant tone, marble floors, white paneled walls, luxurious and sophisticated materials, soft neutral-toned furniture, soft and warm lighting",
-            "industrial_loft": "industrial loft, reclaimed wood, walnut floors, exposed structural elements like pipes and beams, concrete or brick walls, vintage and repurposed furniture, leather and metal accents",
-            "coastal": "coastal style, weathered wood, rattan, jute furniture, natural light, cotton linen, driftwood",
-            "country": "country style, natural materials like wood, and brick walls, delicate grooved details, soft pastel painted wood, and ornate metal handles, floral and plaid patterns furniture, warm tones, soft natural lighting",
-            "scandinavian": "scandinavian style, crisp clean lines, cozy furniture, oak floors, soft natural light, warm natural materials, neutral palettes, airy and tranquil atmosphere",
-            "japanese": "japanese style, wood bamboo stone flooring furniture, clean line, tatami, low wooden table, shoji door, bonsai, bamboo, paper lanterns, natural material pendant lights",
-            "japandi": "japandi style, japanese minimalism, scandinavian coziness, natural wood, clean line, tatami, shoji, japanese aesthetic, warm",
-            "modern_american": "modern american style, wood, metal, glass, timeless furniture, pendant lights, floor lamp, contemporary",
-            "mid_century_modern": "mid century modern interior, warm wooden tones and rich walnut finishes, retro aesthetic furniture, a color palette with muted earth tones and pops of color",
-            "modern_classic": "modern classic style, metallic accent, crown molding, wainscoting, rich fabrics, velvet, silk, linen"
-        }
-        
         # Get style text
         if target_style == "custom" and custom_style:
             style_text = custom_style
-        elif target_style in style_mapping:
-            style_text = style_mapping[target_style]
+        elif target_style in STYLE_MAPPING:
+            style_text = STYLE_MAPPING[target_style]
         else:
             style_text = target_style.replace("_", " ").title()
         
-        prompt = prompt_templates.style_transfer(
-            source_image_description="the uploaded image",
-            target_style=style_text
-        )
+        prompt = uploaded_style_transfer(target_style=style_text)
         
-        result = image_generator.generate_image_editing(
-            input_image=temp_path,
-            prompt=prompt,
-            output_filename=output_filename or "styled"
-        )
+        async with upload_input(file, background_tasks) as input_image:
+            result = await image_generator.agenerate_image_editing(
+                input_image=input_image,
+                prompt=prompt,
+                output_filename=output_filename or "styled"
+            )
         
         # Filter out binary data for JSON response
         if result.get("image_data"):
             del result["image_data"]
         
-        # Clean up temp file
-        os.remove(temp_path)
-        
-        return APIResponse(
+        return json_response(APIResponse(
             success=True,
             message="Style transferred successfully",
             data=result
-        )
+        ))
     except Exception as e:
-        # Clean up temp file if it exists
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Composition endpoint
 @app.post("/api/composition", response_model=APIResponse)
 async def compose_images(
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     goal: str = Form(...),
     output_filename: Optional[str] = Form(None)
 ):
     """Compose multiple images into a new scene"""
     try:
-        # Save uploaded files temporarily
-        temp_paths = []
-        for i, file in enumerate(files):
-            temp_path = f"temp_{i}_{file.filename}"
-            with open(temp_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            temp_paths.append(temp_path)
-        
         # Compose images using template-based generation
-        prompt = prompt_templates.multi_image_composition(
-            images=["the uploaded images"],
-            composition_goal=goal,
-            blending_style="seamless"
-        )
+        prompt = uploaded_images_composition(composition_goal=goal)
         
-        # Use the new multi-image composition method
-        result = image_generator.generate_multi_image_composition(
-            input_images=temp_paths,
-            prompt=prompt,
-            output_filename=output_filename or "composed"
-        )
+        # Large uploads are staged concurrently; temp files are removed after the response
+        async with upload_inputs(files, background_tasks) as input_images:
+            result = await image_generator.agenerate_multi_image_composition(
+                input_images=input_images,
+                prompt=prompt,
+                output_filename=output_filename or "composed"
+            )
         
         # Filter out binary data for JSON response
         if result.get("image_data"):
             del result["image_data"]
         
-        # Clean up temp files
-        for temp_path in temp_paths:
-            os.remove(temp_path)
-        
-        return APIResponse(
+        return json_response(APIResponse(
             success=True,
             message="Images composed successfully",
             data=result
-        )
+        ))
     except Exception as e:
-        # Clean up temp files if they exist
-        for temp_path in temp_paths:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
+# Template builders, keyed by TemplateRequest.template_type
+def build_text_template(request: TemplateRequest) -> str:
+    return prompt_templates.text_to_image(
+        subject=request.subject or "image",
+        style=ImageStyle(request.style) if request.style else ImageStyle.PHOTOREALISTIC,
+        context=request.context,
+        camera_angle=CameraAngle(request.angle) if request.angle else None,
+        lighting=request.lighting,
+        composition=request.composition
+    )
+
+def build_inpainting_template(request: TemplateRequest) -> str:
+    return prompt_templates.inpainting(
+        base_image_description=request.base or "image",
+        mask_area=request.mask or "area",
+        replacement_content=request.replace or "content"
+    )
+
+def build_style_template(request: TemplateRequest) -> str:
+    return prompt_templates.style_transfer(
+        source_image_description=request.source or "source image",
+        target_style=request.target or "target style"
+    )
+
+def build_composition_template(request: TemplateRequest) -> str:
+    return prompt_templates.multi_image_composition(
+        images=["the provided images"],
+        composition_goal=request.goal or "composition goal",
+        blending_style=request.blending or "seamless"
+    )
+
+def build_text_rendering_template(request: TemplateRequest) -> str:
+    return prompt_templates.text_rendering(
+        text_content=request.text_content or "text",
+        design_style=request.design_style or "modern",
+        context=request.context or "poster"
+    )
+
+def build_clean_room_template(request: TemplateRequest) -> str:
+    return prompt_templates.clean_room(
+        specific_objects=request.objects,
+        maintain_layout=request.maintain_layout
+    )
+
+def build_step_by_step_template(request: TemplateRequest) -> str:
+    return prompt_templates.step_by_step_instructions(
+        steps=request.steps or ["step 1", "step 2"]
+    )
+
+TEMPLATE_BUILDERS = MappingProxyType({
+    "text": build_text_template,
+    "inpainting": build_inpainting_template,
+    "style": build_style_template,
+    "composition": build_composition_template,
+    "text_rendering": build_text_rendering_template,
+    "clean_room": build_clean_room_template,
+    "step_by_step": build_step_by_step_template
+})
+
 # Templates endpoint
 @app.post("/api/templates", response_model=APIResponse)
 async def get_template(request: TemplateRequest):
     """Get formatted prompt template"""
+    build_template = TEMPLATE_BUILDERS.get(request.template_type)
+    if build_template is None:
+        raise HTTPException(status_code=400, detail=f"Unknown template type: {request.template_type}")
+    
     try:
-        # Generate template based on type
-        if request.template_type == "text":
-            template = prompt_templates.text_to_image(
-                subject=request.subject or "image",
-                style=ImageStyle(request.style) if request.style else ImageStyle.PHOTOREALISTIC,
-                context=request.context,
-                camera_angle=CameraAngle(request.angle) if request.angle else None,
-                lighting=request.lighting,
-                composition=request.composition
-            )
-        elif request.template_type == "inpainting":
-            template = prompt_templates.inpainting(
-                base_image=request.base or "image",
-                mask_area=request.mask or "area",
-                replacement_content=request.replace or "content"
-            )
-        elif request.template_type == "style":
-            template = prompt_templates.style_transfer(
-                source_image=request.source or "source image",
-                target_style=request.target or "target style"
-            )
-        elif request.template_type == "composition":
-            template = prompt_templates.multi_image_composition(
-                goal=request.goal or "composition goal",
-                blending_style=request.blending or "seamless"
-            )
-        elif request.template_type == "text_rendering":
-            template = prompt_templates.text_rendering(
-                text_content=request.text_content or "text",
-                design_style=request.design_style or "modern"
-            )
-        elif request.template_type == "clean_room":
-            template = prompt_templates.clean_room(
-                specific_objects=request.objects,
-                maintain_layout=request.maintain_layout
-            )
-        elif request.template_type == "step_by_step":
-            template = prompt_templates.step_by_step(
-                steps=request.steps or ["step 1", "step 2"]
-            )
-        else:
-            raise ValueError(f"Unknown template type: {request.template_type}")
+        template = build_template(request)
         
-        return APIResponse(
+        return json_response(APIResponse(
             success=True,
             message="Template generated successfully",
             data={"template": template}
-        )
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Get available styles and angles
 @app.get("/api/styles")
-async def get_styles():
+async def get_styles(request: Request):
     """Get available image styles"""
-    return {
-        "styles": [style.value for style in ImageStyle],
-        "angles": [angle.value for angle in CameraAngle]
-    }
+    if not_modified(request, STYLES_HEADERS["ETag"]):
+        return Response(status_code=304, headers=STYLES_HEADERS)
+    return Response(content=STYLES_BODY, media_type="application/json", headers=STYLES_HEADERS)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    share_context_cache()
+    # uvicorn picks uvloop and httptools automatically when they are installed (uvicorn[standard])
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=worker_count(),
+        backlog=2048
+    )
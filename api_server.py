@@ -3,16 +3,24 @@
 FastAPI server for Gemini Image Generation API
 
 This script starts the FastAPI server with all image generation endpoints.
+Set DEV_RELOAD=1 to restart the server whenever a source file changes, and
+WEB_CONCURRENCY to change the number of worker processes.
 """
 
+import os
 import uvicorn
-from api.main import app
+from api.main import app, share_context_cache, worker_count
 
 if __name__ == "__main__":
+    # uvicorn uses uvloop and httptools automatically when they are installed.
+    # The reloader runs a single process, so workers only apply without it.
+    reload = os.getenv("DEV_RELOAD") == "1"
+    share_context_cache()
     uvicorn.run(
         "api.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=reload,
+        workers=None if reload else worker_count(),
         log_level="info"
     )
@@ -14,19 +14,43 @@ All system prompts are externalized to ai/resources/prompts/ directory.
 """
 
 import sys
+import logging
 import argparse
+from functools import lru_cache
 from pathlib import Path
 
 # Add current directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from ai import ImageGenerator, ImageStyle, CameraAngle
-from ai.prompt_templates import PromptTemplates
+from ai import ImageStyle, CameraAngle
+from ai.prompt_templates import get_prompt_templates
+
+STYLES = ('photorealistic', 'artistic', 'cartoon', 'anime', 'oil_painting', 'watercolor', 'sketch', 'digital_art')
+STYLE_SUFFIX = {style: f" in {style} style" for style in STYLES}
+ANGLE_MAP = {
+    'wide_angle': 'wide-angle shot',
+    'close_up': 'close-up shot',
+    'bird_eye': "bird's eye view",
+    'dutch_angle': 'dutch angle'
+}
+
+# Fixed-shape prompts for the image commands, filled with one format call each
+STYLE_PROMPT = "Apply {style} style to this image{preserve}".format
+PRESERVE_SUBJECT = " while preserving the main subject and composition"
+COMPOSITION_PROMPT = "Combine {images} to create {goal} with {blending} blending".format
+COMPOSITION_IMAGES = {count: ", ".join(f"image {i + 1}" for i in range(count)) for count in (2, 3)}
+
+
+@lru_cache(maxsize=1)
+def create_generator():
+    """Create the shared image generator, importing the Gemini SDK only for commands that call it"""
+    from ai import ImageGenerator
+    return ImageGenerator()
 
 
 def cmd_generate(args):
     """Generate images from text descriptions (Text-to-Image)"""
-    generator = ImageGenerator()
+    generator = create_generator()
     
     # Determine style
     if args.style == 'custom' and args.custom_style:
@@ -36,34 +60,15 @@ def cmd_generate(args):
     else:
         style = 'photorealistic'
     
-    # Build prompt with optional parameters
-    prompt_parts = [args.prompt]
-    
-    if args.context:
-        prompt_parts.insert(0, f"Create a {args.context} featuring")
-        prompt_parts.append("")
-    
-    if args.angle:
-        angle_map = {
-            'wide_angle': 'wide-angle shot',
-            'close_up': 'close-up shot', 
-            'bird_eye': "bird's eye view",
-            'dutch_angle': 'dutch angle'
-        }
-        prompt_parts.append(f"using {angle_map[args.angle]}")
-    
-    if args.lighting:
-        prompt_parts.append(f"with {args.lighting}")
-    
-    if args.composition:
-        prompt_parts.append(f"and {args.composition}")
-    
-    # Join and clean up prompt
-    full_prompt = " ".join(filter(None, prompt_parts))
-    if not full_prompt.endswith('.'):
-        full_prompt += f" in {style} style."
-    else:
-        full_prompt += f" in {style} style."
+    # Build prompt with optional parameters, in order, skipping unset ones
+    prompt_parts = [
+        f"Create a {args.context} featuring" if args.context else None,
+        args.prompt,
+        f"using {ANGLE_MAP[args.angle]}" if args.angle else None,
+        f"with {args.lighting}" if args.lighting else None,
+        f"and {args.composition}" if args.composition else None
+    ]
+    full_prompt = " ".join(part for part in prompt_parts if part).rstrip('.') + f" in {style} style."
     
     result = generator.generate_text_to_image(
         prompt=full_prompt,
@@ -79,13 +84,13 @@ def cmd_generate(args):
 
 def cmd_edit(args):
     """Edit existing images with text prompts (Image + Text-to-Image)"""
-    generator = ImageGenerator()
+    generator = create_generator()
     
     # Determine style
     if args.style == 'custom' and args.custom_style:
         style_text = f" in {args.custom_style} style"
     elif args.style:
-        style_text = f" in {args.style} style"
+        style_text = STYLE_SUFFIX[args.style]
     else:
         style_text = ""
     
@@ -107,7 +112,7 @@ def cmd_edit(args):
 
 def cmd_clean(args):
     """Clean room clutter and unnecessary objects"""
-    generator = ImageGenerator()
+    generator = create_generator()
     
     result = generator.clean_image(
         input_image=args.input,
@@ -125,7 +130,7 @@ def cmd_clean(args):
 
 def cmd_style(args):
     """Transfer style from one image to another (Style Transfer)"""
-    generator = ImageGenerator()
+    generator = create_generator()
     
     # Determine target style
     if args.target_style == 'custom' and args.custom_style:
@@ -136,8 +141,7 @@ def cmd_style(args):
         target_style = 'artistic'
     
     # Build style transfer prompt
-    preserve_text = " while preserving the main subject and composition" if args.preserve_subject else ""
-    style_prompt = f"Apply {target_style} style to this image{preserve_text}"
+    style_prompt = STYLE_PROMPT(style=target_style, preserve=PRESERVE_SUBJECT if args.preserve_subject else "")
     
     result = generator.edit_image(
         input_image=args.input,
@@ -154,15 +158,16 @@ def cmd_style(args):
 
 def cmd_composition(args):
     """Compose multiple images into a new scene (Multi-Image to Image)"""
-    generator = ImageGenerator()
+    generator = create_generator()
     
     if len(args.inputs) < 2 or len(args.inputs) > 3:
         print("❌ Composition requires 2-3 input images")
         return
     
     # Build composition prompt
-    images_text = ", ".join([f"image {i+1}" for i in range(len(args.inputs))])
-    composition_prompt = f"Combine {images_text} to create {args.goal} with {args.blending} blending"
+    composition_prompt = COMPOSITION_PROMPT(
+        images=COMPOSITION_IMAGES[len(args.inputs)], goal=args.goal, blending=args.blending
+    )
     
     # For now, use the first image as base and edit with composition prompt
     # In a full implementation, this would handle multiple images
@@ -181,7 +186,7 @@ def cmd_composition(args):
 
 def cmd_templates(args):
     """Show available prompt templates"""
-    templates = PromptTemplates()
+    templates = get_prompt_templates()
     
     if args.type == 'text':
         if args.subject and args.style:
@@ -258,10 +263,10 @@ Examples:
     # Generate command - Text-to-Image
     generate_parser = subparsers.add_parser('generate', help='Generate images from text descriptions')
     generate_parser.add_argument('--prompt', required=True, help='Text prompt for image generation')
-    generate_parser.add_argument('--style', choices=['photorealistic', 'artistic', 'cartoon', 'anime', 'oil_painting', 'watercolor', 'sketch', 'digital_art', 'custom'], default='photorealistic', help='Image style (use custom for free-form style description)')
+    generate_parser.add_argument('--style', choices=[*STYLES, 'custom'], default='photorealistic', help='Image style (use custom for free-form style description)')
     generate_parser.add_argument('--custom_style', help='Custom style description (when style=custom)')
     generate_parser.add_argument('--context', help='Context or purpose (e.g., product photography, logo design)')
-    generate_parser.add_argument('--angle', choices=['wide_angle', 'close_up', 'bird_eye', 'dutch_angle'], help='Camera angle')
+    generate_parser.add_argument('--angle', choices=list(ANGLE_MAP), help='Camera angle')
     generate_parser.add_argument('--lighting', help='Lighting description')
     generate_parser.add_argument('--composition', help='Composition elements')
     generate_parser.add_argument('--output', '-o', default='generated', help='Output filename')
@@ -271,7 +276,7 @@ Examples:
     edit_parser = subparsers.add_parser('edit', help='Edit existing images with text prompts')
     edit_parser.add_argument('--input', '-i', required=True, help='Input image path')
     edit_parser.add_argument('--prompt', required=True, help='Edit instruction (add, remove, modify elements)')
-    edit_parser.add_argument('--style', choices=['photorealistic', 'artistic', 'cartoon', 'anime', 'oil_painting', 'watercolor', 'sketch', 'digital_art', 'custom'], help='Target style for editing')
+    edit_parser.add_argument('--style', choices=[*STYLES, 'custom'], help='Target style for editing')
     edit_parser.add_argument('--custom_style', help='Custom style description (when style=custom)')
     edit_parser.add_argument('--output', '-o', default='edited', help='Output filename')
     edit_parser.set_defaults(func=cmd_edit)
@@ -287,7 +292,7 @@ Examples:
     # Style command - Style Transfer
     style_parser = subparsers.add_parser('style', help='Transfer style from one image to another')
     style_parser.add_argument('--input', '-i', required=True, help='Input image path')
-    style_parser.add_argument('--target_style', choices=['photorealistic', 'artistic', 'cartoon', 'anime', 'oil_painting', 'watercolor', 'sketch', 'digital_art', 'custom'], default='artistic', help='Target style')
+    style_parser.add_argument('--target_style', choices=[*STYLES, 'custom'], default='artistic', help='Target style')
     style_parser.add_argument('--custom_style', help='Custom style description (when target_style=custom)')
     style_parser.add_argument('--preserve_subject', action='store_true', default=True, help='Preserve main subject and composition')
     style_parser.add_argument('--output', '-o', default='styled', help='Output filename')
@@ -305,7 +310,7 @@ Examples:
     templates_parser = subparsers.add_parser('templates', help='Show available prompt templates')
     templates_parser.add_argument('--type', choices=['text', 'edit', 'style', 'composition', 'clean'], help='Template type')
     templates_parser.add_argument('--subject', help='Subject for template preview')
-    templates_parser.add_argument('--style', choices=['photorealistic', 'artistic', 'cartoon', 'anime', 'oil_painting', 'watercolor', 'sketch', 'digital_art'], help='Style for template preview')
+    templates_parser.add_argument('--style', choices=STYLES, help='Style for template preview')
     templates_parser.add_argument('--context', help='Context for template preview')
     templates_parser.set_defaults(func=cmd_templates)
     
@@ -316,6 +321,8 @@ Examples:
         parser.print_help()
         return
     
+    logging.basicConfig(level=logging.INFO)
+    
     try:
         args.func(args)
     except Exception as e:
@@ -8,18 +8,38 @@ This script tests all API endpoints to ensure they work correctly.
 import requests
 import json
 import time
-import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuration
 BASE_URL = "http://localhost:8000"
 TEST_IMAGE_PATH = "assets/images/living_room.png"
 
+# Read the test image once; every upload test sends these bytes
+try:
+    IMG_BYTES = Path(TEST_IMAGE_PATH).read_bytes()
+except FileNotFoundError:
+    IMG_BYTES = None
+
+# One keep-alive session shared by every test, so connections are reused;
+# idempotent requests are retried with backoff on transient gateway errors
+# (but not when the server is down, which fails fast)
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, connect=0, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 def test_health():
     """Test health check endpoint"""
     print("🔍 Testing health check...")
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = SESSION.get(f"{BASE_URL}/health")
         if response.status_code == 200:
             print("✅ Health check passed")
             return True
@@ -40,7 +60,7 @@ def test_templates():
             "style": "photorealistic",
             "context": "interior design"
         }
-        response = requests.post(f"{BASE_URL}/api/templates", json=data)
+        response = SESSION.post(f"{BASE_URL}/api/templates", json=data)
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -61,7 +81,7 @@ def test_styles():
     """Test styles endpoint"""
     print("🔍 Testing styles endpoint...")
     try:
-        response = requests.get(f"{BASE_URL}/api/styles")
+        response = SESSION.get(f"{BASE_URL}/api/styles")
         if response.status_code == 200:
             data = response.json()
             print("✅ Styles endpoint passed")
@@ -84,7 +104,7 @@ def test_generate():
             "style": "photorealistic",
             "output_filename": "test_generate"
         }
-        response = requests.post(f"{BASE_URL}/api/generate", json=data)
+        response = SESSION.post(f"{BASE_URL}/api/generate", json=data)
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -100,22 +120,21 @@ def test_generate():
         print(f"❌ Image generation error: {e}")
         return False
 
-def test_edit():
+def test_edit(img_bytes=IMG_BYTES):
     """Test image editing endpoint"""
     print("🔍 Testing image editing...")
-    if not os.path.exists(TEST_IMAGE_PATH):
+    if img_bytes is None:
         print(f"⚠️  Test image not found: {TEST_IMAGE_PATH}")
         return True  # Skip this test
     
     try:
-        with open(TEST_IMAGE_PATH, 'rb') as f:
-            files = {'file': f}
-            data = {
-                'prompt': 'add a test element',
-                'output_filename': 'test_edit'
-            }
-            response = requests.post(f"{BASE_URL}/api/edit", files=files, data=data)
-        
+        files = {'file': ('image.png', img_bytes, 'image/png')}
+        data = {
+            'prompt': 'add a test element',
+            'output_filename': 'test_edit'
+        }
+        response = SESSION.post(f"{BASE_URL}/api/edit", files=files, data=data)
+
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -131,23 +150,22 @@ def test_edit():
         print(f"❌ Image editing error: {e}")
         return False
 
-def test_clean():
+def test_clean(img_bytes=IMG_BYTES):
     """Test room cleaning endpoint"""
     print("🔍 Testing room cleaning...")
-    if not os.path.exists(TEST_IMAGE_PATH):
+    if img_bytes is None:
         print(f"⚠️  Test image not found: {TEST_IMAGE_PATH}")
         return True  # Skip this test
     
     try:
-        with open(TEST_IMAGE_PATH, 'rb') as f:
-            files = {'file': f}
-            data = {
-                'objects': 'test objects',
-                'maintain_layout': True,
-                'output_filename': 'test_clean'
-            }
-            response = requests.post(f"{BASE_URL}/api/clean", files=files, data=data)
-        
+        files = {'file': ('image.png', img_bytes, 'image/png')}
+        data = {
+            'objects': 'test objects',
+            'maintain_layout': True,
+            'output_filename': 'test_clean'
+        }
+        response = SESSION.post(f"{BASE_URL}/api/clean", files=files, data=data)
+
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -163,22 +181,21 @@ def test_clean():
         print(f"❌ Room cleaning error: {e}")
         return False
 
-def test_style():
+def test_style(img_bytes=IMG_BYTES):
     """Test style transfer endpoint"""
     print("🔍 Testing style transfer...")
-    if not os.path.exists(TEST_IMAGE_PATH):
+    if img_bytes is None:
         print(f"⚠️  Test image not found: {TEST_IMAGE_PATH}")
         return True  # Skip this test
     
     try:
-        with open(TEST_IMAGE_PATH, 'rb') as f:
-            files = {'file': f}
-            data = {
-                'target_style': 'artistic',
-                'output_filename': 'test_style'
-            }
-            response = requests.post(f"{BASE_URL}/api/style", files=files, data=data)
-        
+        files = {'file': ('image.png', img_bytes, 'image/png')}
+        data = {
+            'target_style': 'artistic',
+            'output_filename': 'test_style'
+        }
+        response = SESSION.post(f"{BASE_URL}/api/style", files=files, data=data)
+
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -194,23 +211,23 @@ def test_style():
         print(f"❌ Style transfer error: {e}")
         return False
 
-def test_composition():
+def test_composition(img_bytes=IMG_BYTES):
     """Test multi-image composition endpoint"""
     print("🔍 Testing multi-image composition...")
-    if not os.path.exists(TEST_IMAGE_PATH):
+    if img_bytes is None:
         print(f"⚠️  Test image not found: {TEST_IMAGE_PATH}")
         return True  # Skip this test
     
     try:
-        with open(TEST_IMAGE_PATH, 'rb') as f:
-            files = [('files', f), ('files', f)]  # Use same image twice
-            data = {
-                'goal': 'test composition',
-                'blending': 'seamless',
-                'output_filename': 'test_composition'
-            }
-            response = requests.post(f"{BASE_URL}/api/composition", files=files, data=data)
-        
+        upload = ('image.png', img_bytes, 'image/png')
+        files = [('files', upload), ('files', upload)]  # Use same image twice
+        data = {
+            'goal': 'test composition',
+            'blending': 'seamless',
+            'output_filename': 'test_composition'
+        }
+        response = SESSION.post(f"{BASE_URL}/api/composition", files=files, data=data)
+
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -226,6 +243,14 @@ def test_composition():
         print(f"❌ Multi-image composition error: {e}")
         return False
 
+def run_test(test):
+    """Run one test, treating a crash as a failure"""
+    try:
+        return bool(test())
+    except Exception as e:
+        print(f"❌ Test {test.__name__} crashed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🚀 Starting API tests...")
@@ -233,8 +258,9 @@ def main():
     print(f"   Test image: {TEST_IMAGE_PATH}")
     print()
     
+    # The health check gates the run; the rest are independent and mostly
+    # wait on Gemini, so they run concurrently
     tests = [
-        test_health,
         test_templates,
         test_styles,
         test_generate,
@@ -244,16 +270,18 @@ def main():
         test_composition
     ]
     
-    passed = 0
-    total = len(tests)
+    total = len(tests) + 1
+    if not run_test(test_health):
+        print("=" * 50)
+        print(f"📊 Test Results: 0/{total} passed")
+        print("⚠️  Server is not healthy, skipping remaining tests")
+        return 1
+    print()
     
-    for test in tests:
-        try:
-            if test():
-                passed += 1
-        except Exception as e:
-            print(f"❌ Test {test.__name__} crashed: {e}")
-        print()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(run_test, tests))
+    passed = 1 + sum(results)
+    print()
     
     print("=" * 50)
     print(f"📊 Test Results: {passed}/{total} passed")
@@ -0,0 +1,34 @@
+"""
+Shared pytest fixtures
+"""
+
+from io import BytesIO
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from PIL import Image
+
+
+def _canned_response():
+    """Build a Gemini response carrying one small PNG image"""
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), "white").save(buffer, format="PNG")
+    part = Mock(text=None)
+    part.inline_data.data = buffer.getvalue()
+    candidate = Mock(finish_reason="STOP")
+    candidate.content.parts = [part]
+    response = Mock(candidates=[candidate], usage_metadata=None)
+    return response
+
+
+CANNED_RESPONSE = _canned_response()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def mock_gemini_client():
+    """Replace the Gemini client so no test can reach the network"""
+    with patch("ai.image_generator.genai.Client", autospec=True) as client:
+        client.return_value.models.generate_content.return_value = CANNED_RESPONSE
+        client.return_value.aio.models.generate_content = AsyncMock(return_value=CANNED_RESPONSE)
+        client.return_value.aio.aclose = AsyncMock()
+        yield client
@@ -0,0 +1,62 @@
+"""
+Tests for the FastAPI server
+"""
+
+import asyncio
+import os
+from io import BytesIO
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+from PIL import Image
+
+# The app mounts outputs/ when it is imported, before the generator creates it
+os.makedirs("outputs", exist_ok=True)
+with patch.dict(os.environ, {'GEMINI_API_KEY': 'test_key'}):
+    from api import main
+
+
+def _png_response(color):
+    """Gemini response carrying one small PNG in the given color"""
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format="PNG")
+    part = Mock(text=None)
+    part.inline_data.data = buffer.getvalue()
+    candidate = Mock(finish_reason="STOP")
+    candidate.content.parts = [part]
+    return Mock(candidates=[candidate], usage_metadata=None)
+
+
+class TestGenerateEndpoint:
+    """Test cases for /api/generate"""
+    
+    def test_concurrent_png_responses_get_their_own_image(self, tmp_path):
+        """Test that two concurrent Accept: image/png requests each receive their own image"""
+        responses = {"red": _png_response("red"), "blue": _png_response("blue")}
+        barrier = asyncio.Barrier(2)
+        
+        async def generate_content(model, contents, config):
+            # Let both requests finish generating together, so their saves overlap
+            await barrier.wait()
+            return responses[contents[0]]
+        
+        client = Mock()
+        client.aio.models.generate_content = AsyncMock(side_effect=generate_content)
+        
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await asyncio.gather(*(
+                    http.post("/api/generate", json={"prompt": color}, headers={"Accept": "image/png"})
+                    for color in responses
+                ))
+        
+        generator = main.image_generator
+        with patch.object(generator, "client", client), \
+                patch.object(generator, "_output_str", os.fspath(tmp_path)), \
+                patch.object(generator, "use_cache", False):
+            red, blue = asyncio.run(run())
+        
+        assert red.headers["content-type"] == blue.headers["content-type"] == "image/png"
+        assert Image.open(BytesIO(red.content)).getpixel((0, 0)) == (255, 0, 0)
+        assert Image.open(BytesIO(blue.content)).getpixel((0, 0)) == (0, 0, 255)
@@ -12,13 +12,28 @@ Key Features:
 - Error handling
 """
 
+import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from ai import ImageGenerator, PromptTemplates, ImageStyle, CameraAngle
+from ai import ImageGenerator, ImageStyle, CameraAngle, get_prompt_templates
+
+# GEMINI_SMOKE=1 runs the examples against an offline stub instead of the API
+if os.getenv("GEMINI_SMOKE"):
+    from ai.stub import StubGenerator as ImageGenerator
+
+# Shared instance: repeated template calls with the same arguments are memoized
+prompt_templates = get_prompt_templates()
+
+
+@lru_cache(maxsize=1)
+def _generator():
+    """Return one ImageGenerator shared by every example in this tutorial"""
+    return ImageGenerator()
 
 
 def basic_text_to_image():
@@ -26,8 +41,8 @@ def basic_text_to_image():
     print("🎨 Basic Text-to-Image Generation")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Simple prompt
     prompt = "A beautiful sunset over a mountain landscape with a lake in the foreground"
@@ -53,8 +68,8 @@ def professional_text_to_image():
     print("\n🎨 Professional Text-to-Image Generation")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Use professional template
     result = generator.generate_with_template(
@@ -79,11 +94,11 @@ def logo_design_example():
     print("\n🎨 Logo Design Example")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Logo design prompt
-    prompt = PromptTemplates.text_rendering(
+    prompt = prompt_templates.text_rendering(
         text_content="TECHNOVA",
         design_style="modern minimalist with geometric elements",
         context="a professional logo"
@@ -107,8 +122,8 @@ def step_by_step_generation():
     print("\n🎨 Step-by-Step Generation")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Step-by-step instructions
     steps = [
@@ -118,7 +133,7 @@ def step_by_step_generation():
         "Add mystical lighting effects around the sword"
     ]
     
-    prompt = PromptTemplates.step_by_step_instructions(steps)
+    prompt = prompt_templates.step_by_step_instructions(steps)
     
     result = generator.generate_text_to_image(
         prompt=prompt,
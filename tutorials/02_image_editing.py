@@ -12,14 +12,25 @@ Key Features:
 - Element addition and removal
 """
 
+import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from ai import ImageGenerator, PromptTemplates, ImageStyle
-from PIL import Image
+from ai import ImageGenerator, ImageStyle
+
+# GEMINI_SMOKE=1 runs the examples against an offline stub instead of the API
+if os.getenv("GEMINI_SMOKE"):
+    from ai.stub import StubGenerator as ImageGenerator
+
+
+@lru_cache(maxsize=1)
+def _generator():
+    """Return one ImageGenerator shared by every example in this tutorial"""
+    return ImageGenerator()
 
 
 def basic_image_editing():
@@ -27,8 +38,8 @@ def basic_image_editing():
     print("🎨 Basic Image Editing")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # First, generate a base image
     base_prompt = "A modern living room with white walls, a sofa, and a coffee table"
@@ -69,8 +80,8 @@ def inpainting_example():
     print("\n🎨 Inpainting Example")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Create a base image first
     base_prompt = "A portrait of a person in a business suit standing in front of a plain white background"
@@ -109,8 +120,8 @@ def style_transfer_example():
     print("\n🎨 Style Transfer Example")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Create a base image
     base_prompt = "A simple house with a garden"
@@ -149,8 +160,8 @@ def adding_elements_example():
     print("\n🎨 Adding Elements Example")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Create a base image
     base_prompt = "An empty park with trees and a walking path"
@@ -188,8 +199,8 @@ def removing_elements_example():
     print("\n🎨 Removing Elements Example")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Create a base image with elements to remove
     base_prompt = "A busy street with cars, people, and street vendors"
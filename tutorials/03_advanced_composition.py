@@ -12,13 +12,32 @@ Key Features:
 - Complex prompt engineering
 """
 
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from ai import ImageGenerator, PromptTemplates, ImageStyle, CameraAngle
+from ai import ImageGenerator, ImageStyle, CameraAngle, get_prompt_templates
+from ai.image_generator import DEFAULT_BATCH_CONCURRENCY
+
+# GEMINI_SMOKE=1 runs the examples against an offline stub instead of the API
+if os.getenv("GEMINI_SMOKE"):
+    from ai.stub import StubGenerator as ImageGenerator
+
+# Shared instance: repeated template calls with the same arguments are memoized
+prompt_templates = get_prompt_templates()
+
+
+@lru_cache(maxsize=1)
+def _generator():
+    """Return one ImageGenerator shared by every example in this tutorial"""
+    # Batch prompts run concurrently, up to this many in flight
+    concurrency = int(os.getenv("GEMINI_BATCH_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY))
+    return ImageGenerator(concurrency=concurrency)
 
 
 def multi_image_composition():
@@ -26,44 +45,31 @@ def multi_image_composition():
     print("🎨 Multi-Image Composition")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
-    # Create individual elements first
+    # Create individual elements first; they don't depend on each other,
+    # so the three requests run at the same time
     print("Creating individual elements...")
     
-    # Element 1: Background
-    bg_result = generator.generate_text_to_image(
-        prompt="A mystical forest with ancient trees and soft sunlight filtering through",
-        output_filename="forest_background",
-        save_image=True
-    )
-    
-    if not bg_result["success"]:
-        print(f"❌ Failed to create background: {bg_result.get('error')}")
-        return
-    
-    # Element 2: Character
-    character_result = generator.generate_text_to_image(
-        prompt="A wise wizard in a long robe holding a glowing staff",
-        output_filename="wizard_character",
-        save_image=True
-    )
+    elements = [
+        ("background", "A mystical forest with ancient trees and soft sunlight filtering through", "forest_background"),
+        ("character", "A wise wizard in a long robe holding a glowing staff", "wizard_character"),
+        ("magic effects", "Magical sparkles and light particles floating in the air", "magic_effects")
+    ]
     
-    if not character_result["success"]:
-        print(f"❌ Failed to create character: {character_result.get('error')}")
-        return
+    def create_element(element):
+        _, prompt, filename = element
+        return generator.generate_text_to_image(prompt=prompt, output_filename=filename, save_image=True)
     
-    # Element 3: Magical effect
-    magic_result = generator.generate_text_to_image(
-        prompt="Magical sparkles and light particles floating in the air",
-        output_filename="magic_effects",
-        save_image=True
-    )
+    with ThreadPoolExecutor(max_workers=len(elements)) as executor:
+        results = list(executor.map(create_element, elements))
     
-    if not magic_result["success"]:
-        print(f"❌ Failed to create magic effects: {magic_result.get('error')}")
-        return
+    for (name, _, _), element_result in zip(elements, results):
+        if not element_result["success"]:
+            print(f"❌ Failed to create {name}: {element_result.get('error')}")
+            return
+    bg_result = results[0]
     
     print("✅ All elements created successfully!")
     
@@ -96,8 +102,8 @@ def iterative_refinement():
     print("\n🎨 Iterative Refinement")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Initial generation
     print("Creating initial image...")
@@ -117,9 +123,9 @@ def iterative_refinement():
     
     # First refinement
     print("Applying first refinement...")
-    refinement_1 = "Add warm, cozy lighting and a bowl of fresh fruit on the counter"
+    refinements = ["Add warm, cozy lighting and a bowl of fresh fruit on the counter"]
     
-    refined_prompt = PromptTemplates.iterative_refinement(initial_prompt, refinement_1)
+    refined_prompt = prompt_templates.iterative_refinement(initial_prompt, refinements)
     
     result_1 = generator.generate_image_editing(
         prompt=refined_prompt,
@@ -136,9 +142,9 @@ def iterative_refinement():
     
     # Second refinement
     print("Applying second refinement...")
-    refinement_2 = "Change the lighting to evening mood with candles and add a cat sitting on the counter"
+    refinements.append("Change the lighting to evening mood with candles and add a cat sitting on the counter")
     
-    refined_prompt_2 = PromptTemplates.iterative_refinement(refined_prompt, refinement_2)
+    refined_prompt_2 = prompt_templates.iterative_refinement(initial_prompt, refinements)
     
     result_2 = generator.generate_image_editing(
         prompt=refined_prompt_2,
@@ -159,12 +165,11 @@ def professional_product_photography():
     print("\n🎨 Professional Product Photography")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Use professional template for product photography
-    result = generator.generate_with_template(
-        template_type="text_to_image",
+    prompt = prompt_templates.text_to_image(
         subject="a premium wireless headphone",
         style=ImageStyle.PHOTOREALISTIC,
         context="professional product photography for e-commerce",
@@ -173,6 +178,12 @@ def professional_product_photography():
         composition="clean white background with subtle gradient"
     )
     
+    result = generator.generate_text_to_image(
+        prompt=prompt,
+        output_filename="headphone_product",
+        save_image=True
+    )
+    
     if result["success"]:
         print(f"✅ Professional product photo generated successfully!")
         print(f"📁 Saved to: {result.get('image_path', 'N/A')}")
@@ -185,11 +196,11 @@ def architectural_visualization():
     print("\n🎨 Architectural Visualization")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Create architectural visualization
-    prompt = PromptTemplates.text_to_image(
+    prompt = prompt_templates.text_to_image(
         subject="a modern minimalist house with large glass windows",
         style=ImageStyle.PHOTOREALISTIC,
         context="architectural visualization for a client presentation",
@@ -216,8 +227,8 @@ def batch_generation_example():
     print("\n🎨 Batch Generation Example")
     print("=" * 40)
     
-    # Initialize the image generator
-    generator = ImageGenerator()
+    # Get the shared image generator
+    generator = _generator()
     
     # Define multiple prompts for batch generation
     prompts = [
@@ -236,13 +247,17 @@ def batch_generation_example():
     )
     
     successful = sum(1 for result in results if result["success"])
-    print(f"✅ Batch generation completed! {successful}/{len(prompts)} images generated successfully.")
     
-    for i, result in enumerate(results):
-        if result["success"]:
-            print(f"  📁 Scene {i+1}: {result.get('image_path', 'N/A')}")
-        else:
-            print(f"  ❌ Scene {i+1}: Failed - {result.get('error', 'Unknown error')}")
+    # Report every scene in prompt order and write it all in one go,
+    # so large batches don't pay a write per line
+    scenes = [
+        f"  📁 Scene {i}: {result.get('image_path', 'N/A')}" if result["success"]
+        else f"  ❌ Scene {i}: Failed - {result.get('error', 'Unknown error')}"
+        for i, result in enumerate(results, 1)
+    ]
+    
+    summary = f"✅ Batch generation completed! {successful}/{len(prompts)} images generated successfully."
+    sys.stdout.write("\n".join([summary, *scenes]) + "\n")
 
 
 if __name__ == "__main__":
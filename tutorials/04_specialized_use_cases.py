@@ -13,54 +13,103 @@ Key Features:
 - Professional photography styles
 """
 
+import argparse
+import asyncio
+import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from ai import ImageGenerator, PromptTemplates, ImageStyle, CameraAngle
+from ai import ImageGenerator, ImageStyle, CameraAngle, get_prompt_templates
+from ai.image_generator import DEFAULT_BATCH_CONCURRENCY
 
+# GEMINI_SMOKE=1 runs the examples against an offline stub instead of the API
+if os.getenv("GEMINI_SMOKE"):
+    from ai.stub import StubGenerator as ImageGenerator
 
-def logo_design_workflow():
-    """Complete logo design workflow example."""
-    print("🎨 Logo Design Workflow")
-    print("=" * 40)
-    
-    # Initialize the image generator
-    generator = ImageGenerator()
+# Shared instance: repeated template calls with the same arguments are memoized
+prompt_templates = get_prompt_templates()
+
+
+@lru_cache(maxsize=1)
+def _generator():
+    """Return one ImageGenerator shared by every example in this tutorial"""
+    return ImageGenerator()
+
+
+# Set by --dry-run: print each section's prompts instead of generating images
+DRY_RUN = False
+
+# Every example runs at once, so cap the requests in flight across all of them
+# to stay under the API rate limit instead of tripping 429 retries
+GEMINI_SEM = asyncio.Semaphore(int(os.getenv("GEMINI_BATCH_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY)))
+
+
+async def _generate(**kwargs):
+    """Generate one image from text, waiting for a free concurrency slot first"""
+    async with GEMINI_SEM:
+        return await _generator().agenerate_text_to_image(**kwargs)
+
+
+async def _run_job(label, prompt, filename):
+    """Generate one job's image and return it with the job's label"""
+    return label, await _generate(prompt=prompt, output_filename=filename, save_image=True)
+
+
+def _report(section, label, result):
+    """Print one generated image's outcome; sections run side by side, so each line names its own"""
+    if result["success"]:
+        print(f"✅ {section}: {label} generated successfully!\n"
+              f"📁 Saved to: {result.get('image_path', 'N/A')}")
+    else:
+        print(f"❌ {section}: {label} failed: {result.get('error', 'Unknown error')}")
+
+
+def _show_prompt(section, label, prompt):
+    """Print a prompt that a dry run would have sent"""
+    print(f"📝 {section}: {label}\n{prompt}\n")
+
+
+async def _run_jobs(section, jobs):
+    """Generate a section's (label, prompt, filename) jobs concurrently, printing each as it finishes"""
+    if DRY_RUN:
+        for label, prompt, _ in jobs:
+            _show_prompt(section, label, prompt)
+        return
     
-    # Logo design with professional template
-    logo_prompts = [
-        "Create a minimalist logo for a tech startup called 'NEXUS' with geometric elements and blue color scheme",
-        "Design a modern logo for 'NEXUS' with clean typography and a subtle tech-inspired icon",
-        "Create a professional logo for 'NEXUS' with a futuristic feel and gradient effects"
-    ]
+    for next_done in asyncio.as_completed([_run_job(*job) for job in jobs]):
+        label, result = await next_done
+        _report(section, label, result)
+
+
+async def logo_design_workflow():
+    """Complete logo design workflow example."""
+    # One brief, several candidates: repeats of a prompt are sent as a single
+    # multi-candidate request, so the variations cost one round trip
+    logo_prompt = (
+        "Create a modern, minimalist logo for a tech startup called 'NEXUS' "
+        "with clean typography and a subtle tech-inspired icon"
+    )
     
-    print("Generating logo variations...")
+    if DRY_RUN:
+        _show_prompt("Logo Design Workflow", "Logo variations 1-3", logo_prompt)
+        return
     
-    for i, prompt in enumerate(logo_prompts, 1):
-        result = generator.generate_text_to_image(
-            prompt=prompt,
-            output_filename=f"nexus_logo_v{i}",
-            save_image=True
+    # The batch holds one GEMINI_SEM permit, so it may only have one request in flight
+    async with GEMINI_SEM:
+        results = await _generator().abatch_generate(
+            [logo_prompt] * 3, output_prefix="nexus_logo", concurrency=1
         )
-        
-        if result["success"]:
-            print(f"✅ Logo variation {i} generated successfully!")
-            print(f"📁 Saved to: {result.get('image_path', 'N/A')}")
-        else:
-            print(f"❌ Logo variation {i} failed: {result.get('error', 'Unknown error')}")
+    
+    for i, result in enumerate(results, 1):
+        _report("Logo Design Workflow", f"Logo variation {i}", result)
 
 
-def interior_design_visualization():
+async def interior_design_visualization():
     """Interior design visualization example."""
-    print("\n🎨 Interior Design Visualization")
-    print("=" * 40)
-    
-    # Initialize the image generator
-    generator = ImageGenerator()
-    
     # Different room designs
     room_designs = [
         {
@@ -83,37 +132,27 @@ def interior_design_visualization():
         }
     ]
     
-    for i, design in enumerate(room_designs, 1):
-        prompt = PromptTemplates.text_to_image(
-            subject=f"a {design['room']}",
-            style=ImageStyle.PHOTOREALISTIC,
-            context="interior design visualization for a client",
-            camera_angle=CameraAngle.WIDE_ANGLE,
-            lighting=design["lighting"],
-            composition=f"with {design['elements']} in {design['style']} style"
-        )
-        
-        result = generator.generate_text_to_image(
-            prompt=prompt,
-            output_filename=f"interior_design_{i}",
-            save_image=True
+    jobs = [
+        (
+            f"{design['room'].title()} design",
+            prompt_templates.text_to_image(
+                subject=f"a {design['room']}",
+                style=ImageStyle.PHOTOREALISTIC,
+                context="interior design visualization for a client",
+                camera_angle=CameraAngle.WIDE_ANGLE,
+                lighting=design["lighting"],
+                composition=f"with {design['elements']} in {design['style']} style"
+            ),
+            f"interior_design_{i}"
         )
-        
-        if result["success"]:
-            print(f"✅ {design['room'].title()} design generated successfully!")
-            print(f"📁 Saved to: {result.get('image_path', 'N/A')}")
-        else:
-            print(f"❌ {design['room'].title()} design failed: {result.get('error', 'Unknown error')}")
+        for i, design in enumerate(room_designs, 1)
+    ]
+    
+    await _run_jobs("Interior Design Visualization", jobs)
 
 
-def character_design_series():
+async def character_design_series():
     """Character design series example."""
-    print("\n🎨 Character Design Series")
-    print("=" * 40)
-    
-    # Initialize the image generator
-    generator = ImageGenerator()
-    
     # Character design prompts
     characters = [
         {
@@ -136,37 +175,27 @@ def character_design_series():
         }
     ]
     
-    for character in characters:
-        prompt = PromptTemplates.text_to_image(
-            subject=character["description"],
-            style=character["style"],
-            context="character design for a video game",
-            camera_angle=CameraAngle.CLOSE_UP,
-            lighting="dramatic character lighting",
-            composition=f"with {character['setting']}"
+    jobs = [
+        (
+            character["name"],
+            prompt_templates.text_to_image(
+                subject=character["description"],
+                style=character["style"],
+                context="character design for a video game",
+                camera_angle=CameraAngle.CLOSE_UP,
+                lighting="dramatic character lighting",
+                composition=f"with {character['setting']}"
+            ),
+            f"character_{character['name'].lower().replace(' ', '_')}"
         )
-        
-        result = generator.generate_text_to_image(
-            prompt=prompt,
-            output_filename=f"character_{character['name'].lower().replace(' ', '_')}",
-            save_image=True
-        )
-        
-        if result["success"]:
-            print(f"✅ {character['name']} generated successfully!")
-            print(f"📁 Saved to: {result.get('image_path', 'N/A')}")
-        else:
-            print(f"❌ {character['name']} failed: {result.get('error', 'Unknown error')}")
+        for character in characters
+    ]
+    
+    await _run_jobs("Character Design Series", jobs)
 
 
-def text_rendering_examples():
+async def text_rendering_examples():
     """Text rendering and typography examples."""
-    print("\n🎨 Text Rendering Examples")
-    print("=" * 40)
-    
-    # Initialize the image generator
-    generator = ImageGenerator()
-    
     # Different text rendering scenarios
     text_examples = [
         {
@@ -186,34 +215,24 @@ def text_rendering_examples():
         }
     ]
     
-    for i, example in enumerate(text_examples, 1):
-        prompt = PromptTemplates.text_rendering(
-            text_content=example["text"],
-            design_style=example["style"],
-            context=example["context"]
-        )
-        
-        result = generator.generate_text_to_image(
-            prompt=prompt,
-            output_filename=f"text_rendering_{i}",
-            save_image=True
+    jobs = [
+        (
+            f"Text rendering {i}",
+            prompt_templates.text_rendering(
+                text_content=example["text"],
+                design_style=example["style"],
+                context=example["context"]
+            ),
+            f"text_rendering_{i}"
         )
-        
-        if result["success"]:
-            print(f"✅ Text rendering {i} generated successfully!")
-            print(f"📁 Saved to: {result.get('image_path', 'N/A')}")
-        else:
-            print(f"❌ Text rendering {i} failed: {result.get('error', 'Unknown error')}")
+        for i, example in enumerate(text_examples, 1)
+    ]
+    
+    await _run_jobs("Text Rendering Examples", jobs)
 
 
-def professional_photography_styles():
+async def professional_photography_styles():
     """Professional photography style examples."""
-    print("\n🎨 Professional Photography Styles")
-    print("=" * 40)
-    
-    # Initialize the image generator
-    generator = ImageGenerator()
-    
     # Different photography styles
     photo_styles = [
         {
@@ -239,37 +258,27 @@ def professional_photography_styles():
         }
     ]
     
-    for i, style in enumerate(photo_styles, 1):
-        prompt = PromptTemplates.text_to_image(
-            subject=style["subject"],
-            style=ImageStyle.PHOTOREALISTIC,
-            context=f"professional {style['style']}",
-            camera_angle=style["angle"],
-            lighting=style["lighting"],
-            composition=f"with {style['background']}"
-        )
-        
-        result = generator.generate_text_to_image(
-            prompt=prompt,
-            output_filename=f"photo_style_{i}",
-            save_image=True
+    jobs = [
+        (
+            style["style"].title(),
+            prompt_templates.text_to_image(
+                subject=style["subject"],
+                style=ImageStyle.PHOTOREALISTIC,
+                context=f"professional {style['style']}",
+                camera_angle=style["angle"],
+                lighting=style["lighting"],
+                composition=f"with {style['background']}"
+            ),
+            f"photo_style_{i}"
         )
-        
-        if result["success"]:
-            print(f"✅ {style['style'].title()} generated successfully!")
-            print(f"📁 Saved to: {result.get('image_path', 'N/A')}")
-        else:
-            print(f"❌ {style['style'].title()} failed: {result.get('error', 'Unknown error')}")
+        for i, style in enumerate(photo_styles, 1)
+    ]
+    
+    await _run_jobs("Professional Photography Styles", jobs)
 
 
-def creative_art_styles():
+async def creative_art_styles():
     """Creative art style examples."""
-    print("\n🎨 Creative Art Styles")
-    print("=" * 40)
-    
-    # Initialize the image generator
-    generator = ImageGenerator()
-    
     # Different art styles
     art_styles = [
         {
@@ -289,44 +298,64 @@ def creative_art_styles():
         }
     ]
     
-    for i, art in enumerate(art_styles, 1):
-        prompt = PromptTemplates.text_to_image(
-            subject=art["subject"],
-            style=art["style"],
-            context=f"artistic {art['description']}",
-            camera_angle=CameraAngle.WIDE_ANGLE,
-            lighting="artistic lighting",
-            composition="with artistic composition and visual appeal"
-        )
-        
-        result = generator.generate_text_to_image(
-            prompt=prompt,
-            output_filename=f"art_style_{i}",
-            save_image=True
+    jobs = [
+        (
+            f"{art['style'].value.title()} art",
+            prompt_templates.text_to_image(
+                subject=art["subject"],
+                style=art["style"],
+                context=f"artistic {art['description']}",
+                camera_angle=CameraAngle.WIDE_ANGLE,
+                lighting="artistic lighting",
+                composition="with artistic composition and visual appeal"
+            ),
+            f"art_style_{i}"
         )
-        
-        if result["success"]:
-            print(f"✅ {art['style'].value.title()} art generated successfully!")
-            print(f"📁 Saved to: {result.get('image_path', 'N/A')}")
-        else:
-            print(f"❌ {art['style'].value.title()} art failed: {result.get('error', 'Unknown error')}")
+        for i, art in enumerate(art_styles, 1)
+    ]
+    
+    await _run_jobs("Creative Art Styles", jobs)
+
+
+# Section name on the command line -> example
+WORKFLOWS = {
+    "logo": logo_design_workflow,
+    "interior": interior_design_visualization,
+    "character": character_design_series,
+    "text": text_rendering_examples,
+    "photography": professional_photography_styles,
+    "art": creative_art_styles,
+}
+
+
+async def main(sections):
+    """Run the selected examples concurrently, printing each image as soon as it is generated."""
+    try:
+        await asyncio.gather(*(WORKFLOWS[name]() for name in sections))
+    finally:
+        # A dry run never creates the generator
+        if _generator.cache_info().currsize:
+            await _generator().aclose()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Specialized use cases tutorial")
+    parser.add_argument("--only", nargs="+", choices=list(WORKFLOWS), default=list(WORKFLOWS),
+                        help="Sections to run (default: all)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the prompts without calling the API")
+    args = parser.parse_args()
+    DRY_RUN = args.dry_run
+    
     print("🚀 Gemini Image Generation - Specialized Use Cases Tutorial")
     print("=" * 70)
     
     try:
-        # Run all examples
-        logo_design_workflow()
-        interior_design_visualization()
-        character_design_series()
-        text_rendering_examples()
-        professional_photography_styles()
-        creative_art_styles()
+        asyncio.run(main(dict.fromkeys(args.only)))
         
-        print("\n🎉 All tutorials completed successfully!")
-        print("Check the 'outputs' directory for generated images.")
+        if not DRY_RUN:
+            print("\n🎉 All tutorials completed successfully!")
+            print("Check the 'outputs' directory for generated images.")
         
     except Exception as e:
         print(f"❌ Tutorial failed: {str(e)}")